@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 2boom.
+
+"""Offline benchmark for the watchdigest check and upgrade paths.
+
+Runs a full check, an upgrade plan and a full upgrade against a local stand-in registry and a
+simulated Docker API, so no network access or Docker daemon is needed.
+
+    python3 benchmark.py --images 2000 --containers 4000 --latency 0.002 --rate-limit 0.01
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import docker
+
+import watchdigest
+
+
+def make_digest(value: str) -> str:
+    """Return a stable sha256 digest string for a value."""
+    return f"sha256:{hashlib.sha256(value.encode('utf-8')).hexdigest()}"
+
+
+def make_layers(reference: str, digest: str) -> list:
+    """Return (diff_id, size) pairs: three base layers shared by all images and one layer per image version."""
+    base = [(make_digest(f"base{index}"), 20 * 1024 * 1024) for index in range(3)]
+    return base + [(make_digest(f"{reference}#{digest}#layer"), 5 * 1024 * 1024)]
+
+
+class FakeRegistry:
+    """Local HTTP stand-in for an OCI registry using token (bearer), basic or no authentication.
+
+    `credentials` is a (username, password) pair required by the token endpoint or by basic auth;
+    `challenge` and `token_body` override the WWW-Authenticate header and the token response.
+    `tags` maps repositories to the tags listed by tags/list, served `tag_page_size` at a time with
+    Link pagination.
+    """
+
+    def __init__(self, latency=0.0, rate_limit=0.0, outdated_ratio=0.2, seed=1, auth="bearer", credentials=None, challenge=None, token_body=None,
+                 tags=None, tag_page_size=100):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.outdated_ratio = outdated_ratio
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.auth = auth
+        self.credentials = credentials
+        self.challenge = challenge
+        self.token_body = token_body
+        self.token_requests = []
+        self.tags = tags or {}
+        self.tag_page_size = tag_page_size
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.host = f"localhost:{self.server.server_address[1]}"
+
+    def is_outdated(self, repository: str) -> bool:
+        """Return True if the registry serves a newer digest than the one installed locally."""
+        return int(hashlib.md5(repository.encode("utf-8")).hexdigest(), 16) % 100 < self.outdated_ratio * 100
+
+    def remote_digest(self, repository: str, tag: str) -> str:
+        """Return the digest the registry reports for a repository tag."""
+        reference = f"{self.host}/{repository}:{tag}"
+        return make_digest(f"{reference}@new") if self.is_outdated(repository) else make_digest(reference)
+
+    def _handler(self):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, headers=None, body=b""):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if registry.latency:
+                    time.sleep(registry.latency)
+
+                if self.path.startswith("/token"):
+                    kind = "token"
+                elif "/manifests/" in self.path:
+                    kind = "manifest"
+                elif "/blobs/" in self.path:
+                    kind = "blob"
+                elif "/tags/list" in self.path:
+                    kind = "tags"
+                else:
+                    kind = "ping"
+
+                with registry.lock:
+                    registry.requests[kind] += 1
+                    throttled = registry.random.random() < registry.rate_limit
+
+                if throttled:
+                    with registry.lock:
+                        registry.requests["429"] += 1
+                    return self.reply(429, {"Retry-After": "1"})
+
+                basic = f"Basic {base64.b64encode(':'.join(registry.credentials).encode()).decode()}" if registry.credentials else None
+
+                if kind == "token":
+                    registry.token_requests.append((self.path, self.headers.get("Authorization")))
+                    if basic and self.headers.get("Authorization") != basic:
+                        return self.reply(401)
+                    body = registry.token_body or json.dumps({"token": "benchmark", "expires_in": 300}).encode("utf-8")
+                    return self.reply(200, {"Content-Type": "application/json"}, body)
+
+                expected = {"bearer": "Bearer benchmark", "basic": basic}.get(registry.auth)
+                if expected and self.headers.get("Authorization") != expected:
+                    challenge = registry.challenge or {
+                        "bearer": f'Bearer realm="http://{registry.host}/token",service="benchmark"',
+                        "basic": 'Basic realm="benchmark"',
+                    }[registry.auth]
+                    return self.reply(401, {"WWW-Authenticate": challenge})
+
+                if kind == "ping":
+                    return self.reply(200)
+
+                if kind == "tags":
+                    url = urlsplit(self.path)
+                    repository = url.path[len("/v2/"):-len("/tags/list")]
+                    query = parse_qs(url.query)
+                    size = min(int(query.get("n", [registry.tag_page_size])[0]), registry.tag_page_size)
+                    tags = sorted(registry.tags.get(repository, []))
+                    if "last" in query:
+                        tags = [tag for tag in tags if tag > query["last"][0]]
+                    headers = {"Content-Type": "application/json"}
+                    if len(tags) > size:
+                        headers["Link"] = f'</v2/{repository}/tags/list?n={size}&last={tags[size - 1]}>; rel="next"'
+                    body = json.dumps({"name": repository, "tags": tags[:size]})
+                    return self.reply(200, headers, body.encode("utf-8"))
+
+                if "/blobs/" in self.path:
+                    repository, tag = self.path.split("/blobs/", 1)[1].rsplit("@", 1)[0].rsplit(":", 1)
+                    layers = make_layers(f"{registry.host}/{repository}:{tag}", registry.remote_digest(repository, tag))
+                    body = json.dumps({"rootfs": {"type": "layers", "diff_ids": [diff_id for diff_id, _ in layers]}})
+                    return self.reply(200, {"Content-Type": "application/json"}, body.encode("utf-8"))
+
+                repository, tag = self.path[len("/v2/"):].split("/manifests/", 1)
+                digest = registry.remote_digest(repository, tag)
+                layers = make_layers(f"{registry.host}/{repository}:{tag}", digest)
+                body = json.dumps({
+                    "schemaVersion": 2,
+                    "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+                    "config": {"digest": f"{repository}:{tag}@config"},
+                    "layers": [{"digest": make_digest(diff_id), "size": size} for diff_id, size in layers],
+                })
+                return self.reply(200, {"Docker-Content-Digest": digest, "Content-Type": "application/json"}, body.encode("utf-8"))
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class FakeImage:
+    def __init__(self, daemon, reference: str, digest: str, tagged: bool = True, created: str = "2025-01-01T00:00:00.123456789Z"):
+        self.daemon = daemon
+        self.id = make_digest(f"{reference}#{digest}")
+        self.tags = [reference] if tagged else []
+        self.attrs = {
+            "RepoDigests": [f"{reference.rsplit(':', 1)[0]}@{digest}"],
+            "Size": 150 * 1024 * 1024,
+            "Created": created,
+            "RootFS": {"Type": "layers", "Layers": [diff_id for diff_id, _ in make_layers(reference, digest)]},
+        }
+
+    def tag(self, repository, tag):
+        self.daemon.count("image_tag")
+        reference = f"{repository}:{tag}"
+        for image in self.daemon.images_by_id.values():
+            if reference in image.tags:
+                image.tags.remove(reference)
+        self.tags.append(reference)
+        return True
+
+
+class FakeContainer:
+    def __init__(self, daemon, name: str, image: FakeImage):
+        self.daemon = daemon
+        self.name = name
+        self.image = image
+        self.status = "running"
+        self.attrs = {
+            "Config": {"Labels": {}, "Env": [], "Cmd": None, "Entrypoint": None},
+            "HostConfig": {"Binds": [], "PortBindings": {}, "RestartPolicy": {"Name": "unless-stopped"}},
+            "NetworkSettings": {"Networks": {"bridge": {}}},
+        }
+
+    @property
+    def labels(self):
+        return self.attrs["Config"]["Labels"]
+
+    def stop(self):
+        self.daemon.count("container_stop")
+        self.status = "exited"
+
+    def remove(self):
+        self.daemon.count("container_remove")
+        self.daemon.containers_by_name.pop(self.name, None)
+
+
+class FakeImages:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def list(self, filters=None):
+        self.daemon.count("image_list")
+        return list(self.daemon.images_by_id.values())
+
+    def get(self, image_id):
+        self.daemon.count("image_get")
+        for image in list(self.daemon.images_by_id.values()):
+            if image.id == image_id or image_id in image.tags or image_id in image.attrs["RepoDigests"]:
+                return image
+        raise docker.errors.ImageNotFound(image_id)
+
+    def pull(self, reference):
+        self.daemon.count("image_pull")
+        if "@" in reference:
+            name, digest = reference.split("@", 1)
+            image = FakeImage(self.daemon, f"{name}:latest", digest, tagged=False)
+            with self.daemon.lock:
+                self.daemon.images_by_id[image.id] = image
+            return image
+
+        host, rest = reference.split("/", 1)
+        repository, tag = rest.rsplit(":", 1)
+        image = FakeImage(self.daemon, reference, self.daemon.registry.remote_digest(repository, tag))
+        for stale in [i for i in self.daemon.images_by_id.values() if reference in i.tags]:
+            stale.tags = []
+        self.daemon.images_by_id[image.id] = image
+        return image
+
+    def remove(self, image_id):
+        self.daemon.count("image_remove")
+        self.daemon.images_by_id.pop(image_id, None)
+
+
+class FakeContainers:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def list(self, all=False):
+        self.daemon.count("container_list")
+        return list(self.daemon.containers_by_name.values())
+
+    def get(self, name):
+        self.daemon.count("container_get")
+        if name not in self.daemon.containers_by_name:
+            raise docker.errors.NotFound(name)
+        return self.daemon.containers_by_name[name]
+
+    def run(self, image, name, **kwargs):
+        self.daemon.count("container_run")
+        container = FakeContainer(self.daemon, name, self.daemon.images.get(image))
+        self.daemon.containers_by_name[name] = container
+        return container
+
+
+class FakeService:
+    def __init__(self, name: str, image: FakeImage):
+        self.id = make_digest(name)[7:32]
+        self.name = name
+        self.version = 1
+        reference = image.tags[0]
+        self.attrs = {
+            "Spec": {
+                "Name": name,
+                "TaskTemplate": {"ContainerSpec": {"Image": f"{reference}@{image.attrs['RepoDigests'][0].split('@')[1]}"}},
+                "UpdateConfig": {"Parallelism": 1},
+            },
+            "UpdatedAt": "2025-01-01T00:00:00.123456789Z",
+        }
+
+
+class FakeServices:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def list(self):
+        self.daemon.count("service_list")
+        return list(self.daemon.services_by_name.values())
+
+    def get(self, name):
+        self.daemon.count("service_get")
+        if name not in self.daemon.services_by_name:
+            raise docker.errors.NotFound(name)
+        return self.daemon.services_by_name[name]
+
+
+class FakeApi:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def update_service(self, service_id, version, task_template=None, update_config=None, fetch_current_spec=False):
+        self.daemon.count("service_update")
+        service = next(s for s in self.daemon.services_by_name.values() if s.id == service_id)
+        service.attrs["Spec"]["TaskTemplate"] = task_template
+        service.attrs["Spec"]["UpdateConfig"] = update_config
+        service.version += 1
+        service.attrs["UpdateStatus"] = {"State": "completed", "StartedAt": f"2025-01-01T00:00:{service.version:02d}Z"}
+        return {}
+
+
+class FakeDockerDaemon:
+    """In-memory Docker API with the subset of docker-py used by watchdigest."""
+
+    def __init__(self, registry: FakeRegistry, images: int, containers: int, services: int = 0, replicas: int = 1):
+        self.registry = registry
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.images = FakeImages(self)
+        self.containers = FakeContainers(self)
+        self.services = FakeServices(self)
+        self.api = FakeApi(self)
+        self.images_by_id = {}
+        self.containers_by_name = {}
+        self.services_by_name = {}
+
+        installed = []
+        for index in range(images):
+            reference = f"{registry.host}/bench/image{index}:latest"
+            image = FakeImage(self, reference, make_digest(reference))
+            self.images_by_id[image.id] = image
+            installed.append(image)
+
+        for index in range(containers):
+            name = f"container{index:05d}"
+            self.containers_by_name[name] = FakeContainer(self, name, installed[index % len(installed)])
+
+        for index in range(services):
+            service = FakeService(f"service{index:05d}", installed[index % len(installed)])
+            self.services_by_name[service.name] = service
+            for replica in range(1, replicas + 1):
+                name = f"{service.name}.{replica}.{service.id}"
+                task = FakeContainer(self, name, installed[index % len(installed)])
+                task.attrs["Config"]["Labels"]["com.docker.swarm.service.id"] = service.id
+                self.containers_by_name[name] = task
+
+    def count(self, call: str):
+        with self.lock:
+            self.requests[call] += 1
+
+    def client(self, *args, **kwargs):
+        return types.SimpleNamespace(images=self.images, containers=self.containers, services=self.services, api=self.api, ping=lambda: True)
+
+
+class VirtualClock:
+    """Replaces time.sleep in watchdigest so fixed waits are accounted for instead of slept."""
+
+    def __init__(self):
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        self.slept += seconds
+
+    def time(self):
+        return time.time() + self.slept
+
+
+def measure(label: str, func) -> dict:
+    """Run func and return its wall time and peak traced memory."""
+    tracemalloc.start()
+    time_start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - time_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"phase": label, "wall_seconds": round(wall, 3), "peak_memory_mb": round(peak / (1024 * 1024), 2)}
+
+
+def run_benchmark(args) -> list:
+    registry = FakeRegistry(args.latency, args.rate_limit, args.outdated, args.seed)
+    registry.start()
+    daemon = FakeDockerDaemon(registry, args.images, args.containers, args.services, args.replicas)
+    clock = VirtualClock()
+
+    watchdigest.docker = types.SimpleNamespace(DockerClient=daemon.client, errors=docker.errors)
+    watchdigest.time = types.SimpleNamespace(sleep=clock.sleep, time=clock.time)
+    watchdigest.platform_base_url = "unix://fake.sock"
+    state_dir = tempfile.mkdtemp(prefix="watchdigest-bench-")
+    watchdigest.file_db = os.path.join(state_dir, "data.db")
+    watchdigest.file_checkpoint = os.path.join(state_dir, "upgrade.json")
+    watchdigest.compose_files = watchdigest.default_compose_files
+    watchdigest.orange_dot, watchdigest.green_dot, watchdigest.red_dot, watchdigest.yellow_dot, watchdigest.white_dot = "o", "g", "r", "y", "w"
+    watchdigest.header_message = "benchmark\n"
+    watchdigest.notify_enabled = False
+    watchdigest.prefetch_enabled = args.prefetch
+    watchdigest.swarm_mode = args.services > 0
+    if not args.verbose:
+        watchdigest.logger.disabled = True
+
+    def upgrade_plan():
+        watchdigest.plan_upgrade(watchdigest.get_outdated_digests())
+
+    def full_upgrade():
+        watchdigest.list_of_outdated_images = watchdigest.get_outdated_digests()
+        watchdigest.pull_and_restart_outdated_images()
+
+    def check():
+        watchdigest.get_outdated_digests_list()
+        if watchdigest.prefetch_executor:
+            watchdigest.prefetch_executor.shutdown(wait=True)
+            watchdigest.prefetch_executor = None
+
+    results = []
+    try:
+        for label, func in (("check", check), ("plan", upgrade_plan), ("upgrade", full_upgrade)):
+            registry.requests.clear()
+            daemon.requests.clear()
+            clock.slept = 0.0
+            result = measure(label, func)
+            result["registry_requests"] = dict(registry.requests)
+            result["docker_calls"] = dict(daemon.requests)
+            result["simulated_sleep_seconds"] = round(clock.slept, 1)
+            results.append(result)
+    finally:
+        registry.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for watchdigest check and upgrade.")
+    parser.add_argument("--images", type=int, default=1000, help="number of tagged images in use")
+    parser.add_argument("--containers", type=int, default=2000, help="number of containers")
+    parser.add_argument("--latency", type=float, default=0.002, help="registry latency per request in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of registry requests answered with 429")
+    parser.add_argument("--services", type=int, default=0, help="number of Swarm services (enables Swarm mode)")
+    parser.add_argument("--replicas", type=int, default=1, help="task containers per Swarm service")
+    parser.add_argument("--outdated", type=float, default=0.1, help="fraction of images with a newer remote digest")
+    parser.add_argument("--seed", type=int, default=1, help="seed for rate limiting")
+    parser.add_argument("--prefetch", action="store_true", help="prefetch new digests during the check phase")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep watchdigest logging enabled")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['phase']}: {result['wall_seconds']:.3f}s wall, {result['peak_memory_mb']:.2f} MB peak, "
+              f"{result['simulated_sleep_seconds']:.1f}s simulated sleep")
+        print(f"  registry requests: {sum(result['registry_requests'].values())} {result['registry_requests']}")
+        print(f"  docker calls: {sum(result['docker_calls'].values())} {result['docker_calls']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
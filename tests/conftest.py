@@ -0,0 +1,67 @@
+import os
+import sys
+import types
+
+import docker
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import watchdigest  # noqa: E402
+from benchmark import FakeRegistry, VirtualClock  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def registry_state(monkeypatch, tmp_path):
+    """Give every test empty registry caches and an empty Docker config directory."""
+    monkeypatch.setenv("DOCKER_CONFIG", str(tmp_path))
+    monkeypatch.setattr(watchdigest, "docker_credentials", None)
+    for name in ("registry_challenges", "registry_tokens", "registry_breakers", "registry_tag_cache"):
+        monkeypatch.setattr(watchdigest, name, {})
+    monkeypatch.setattr(watchdigest.console_handler, "level", 100)
+
+
+@pytest.fixture
+def make_registry():
+    """Start stand-in registries and stop them after the test."""
+    registries = []
+
+    def start(**kwargs):
+        kwargs.setdefault("outdated_ratio", 0)
+        registry = FakeRegistry(**kwargs)
+        registry.start()
+        registries.append(registry)
+        return registry
+
+    yield start
+    for registry in registries:
+        registry.stop()
+
+
+@pytest.fixture
+def use_daemon(monkeypatch, tmp_path):
+    """Point watchdigest at a FakeDockerDaemon, with a virtual clock, state files in tmp_path and empty inventory state."""
+
+    def install(daemon):
+        clock = VirtualClock()
+        monkeypatch.setattr(watchdigest, "docker", types.SimpleNamespace(DockerClient=daemon.client, errors=docker.errors))
+        monkeypatch.setattr(watchdigest, "time", types.SimpleNamespace(sleep=clock.sleep, time=clock.time))
+        monkeypatch.setattr(watchdigest, "platform_base_url", "unix://fake.sock", raising=False)
+        monkeypatch.setattr(watchdigest, "file_db", str(tmp_path / "data.db"), raising=False)
+        monkeypatch.setattr(watchdigest, "file_checkpoint", str(tmp_path / "upgrade.json"), raising=False)
+        monkeypatch.setattr(watchdigest, "upgrade_post_wait", 0)
+        monkeypatch.setattr(watchdigest, "notify_enabled", False)
+        monkeypatch.setattr(watchdigest, "max_pull_mb", 0)
+        monkeypatch.setattr(watchdigest, "prefetch_enabled", False)
+        monkeypatch.setattr(watchdigest, "prefetched_images", {})
+        monkeypatch.setattr(watchdigest, "start_times", watchdigest.default_start_times, raising=False)
+        monkeypatch.setattr(watchdigest, "docker_image_data", [])
+        monkeypatch.setattr(watchdigest, "old_list", [])
+        monkeypatch.setattr(watchdigest, "image_last_checked", {})
+        monkeypatch.setattr(watchdigest, "image_retry_at", {})
+        monkeypatch.setattr(watchdigest, "list_of_outdated_images", [])
+        for name in ("orange_dot", "green_dot", "red_dot", "yellow_dot", "white_dot"):
+            monkeypatch.setattr(watchdigest, name, "*", raising=False)
+        return clock
+
+    return install
@@ -0,0 +1,130 @@
+import pytest
+
+import watchdigest
+
+DAILY, SIX_HOURS, HOURLY = 1440 * 60, 360 * 60, 60 * 60
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    """Record full inventory checks instead of running them."""
+    calls = []
+
+    def fake_list(due_only=False):
+        calls.append(due_only)
+        watchdigest.last_inventory_check = watchdigest.time.time()
+
+    monkeypatch.setattr(watchdigest, "get_outdated_digests_list", fake_list)
+    monkeypatch.setattr(watchdigest, "docker_image_data", [])
+    monkeypatch.setattr(watchdigest, "image_last_checked", {})
+    monkeypatch.setattr(watchdigest, "image_retry_at", {})
+    monkeypatch.setattr(watchdigest, "last_inventory_check", 0.0)
+    return calls
+
+
+def test_empty_inventory_is_checked_once_per_rolling_interval(checks):
+    watchdigest.checkonly_container_images()
+    watchdigest.checkonly_container_images()
+
+    assert checks == [True]
+
+
+def test_inventory_is_relisted_every_rolling_interval_even_if_nothing_is_due(checks, monkeypatch):
+    image = "docker.io/library/postgres:16.2.1"
+    monkeypatch.setattr(watchdigest, "docker_image_data", [watchdigest.ImageRecord(["db"], "sha256:1", image, "1 MB", "")])
+    now = watchdigest.time.time()
+    watchdigest.image_last_checked[image] = now
+
+    watchdigest.last_inventory_check = now
+    watchdigest.checkonly_container_images()
+    assert checks == []
+
+    watchdigest.last_inventory_check = now - watchdigest.check_intervals["rolling"] * 60
+    watchdigest.checkonly_container_images()
+    assert checks == [True]
+
+
+def test_unavailable_image_waits_for_next_probe(checks, monkeypatch):
+    image = "docker.io/library/nginx:latest"
+    monkeypatch.setattr(watchdigest, "docker_image_data", [watchdigest.ImageRecord(["web"], "sha256:1", image, "1 MB", "", "unavailable")])
+    now = watchdigest.time.time()
+
+    watchdigest.last_inventory_check = now
+    watchdigest.image_retry_at[image] = now + 60
+    assert not watchdigest.is_check_due(image, now)
+    watchdigest.checkonly_container_images()
+    assert checks == []
+
+    assert watchdigest.is_check_due(image, now + 61)
+
+
+def test_registry_skip_sets_retry_time(make_registry, monkeypatch, tmp_path):
+    registry = make_registry(rate_limit=1.0)
+    image = f"{registry.host}/team/app:1.0"
+    breaker = watchdigest.get_registry_breaker(registry.host)
+    breaker.failures, breaker.opened_at = breaker.threshold, watchdigest.time.time()
+    monkeypatch.setattr(watchdigest, "get_non_dangling_images", lambda: [watchdigest.ImageRecord(["app"], "sha256:1", image, "1 MB", "")])
+    monkeypatch.setattr(watchdigest, "file_db", str(tmp_path / "data.db"), raising=False)
+    monkeypatch.setattr(watchdigest, "image_retry_at", {})
+    monkeypatch.setattr(watchdigest, "docker_image_data", [])
+    monkeypatch.setattr(watchdigest, "old_list", [])
+
+    watchdigest.get_outdated_digests_list()
+
+    assert watchdigest.docker_image_data[0].status == "unavailable"
+    assert watchdigest.image_retry_at[image] == pytest.approx(breaker.opened_at + breaker.cooldown)
+    assert registry.requests["manifest"] == 0
+
+
+@pytest.mark.parametrize("image, interval", [
+    ("nginx", HOURLY),
+    ("nginx:latest", HOURLY),
+    ("nginx:stable-alpine", HOURLY),
+    ("postgres:16", SIX_HOURS),
+    ("alpine:3.19", SIX_HOURS),
+    ("postgres:16-alpine", SIX_HOURS),
+    ("postgres:16.2.1", DAILY),
+    ("ghcr.io/owner/app:v1.2.3", DAILY),
+    ("app@sha256:" + "a" * 64, DAILY),
+    ("not a reference:", HOURLY),
+])
+def test_check_interval_by_tag_kind(monkeypatch, image, interval):
+    monkeypatch.setattr(watchdigest, "check_intervals", dict(watchdigest.default_check_intervals))
+
+    assert watchdigest.get_check_interval(image) == interval
+
+
+def test_check_intervals_follow_config(monkeypatch):
+    monkeypatch.setattr(watchdigest, "check_intervals", {"rolling": 5, "major": 10, "pinned": 20})
+
+    assert [watchdigest.get_check_interval(image) for image in ("nginx", "postgres:16", "postgres:16.2.1")] == [300, 600, 1200]
+
+
+def test_check_offset_is_deterministic_and_in_range():
+    offsets = [watchdigest.get_check_offset(f"docker.io/team/app{index}:latest", HOURLY) for index in range(50)]
+
+    assert offsets == [watchdigest.get_check_offset(f"docker.io/team/app{index}:latest", HOURLY) for index in range(50)]
+    assert all(0 <= offset < HOURLY for offset in offsets)
+
+
+def test_check_offsets_spread_images_across_the_interval():
+    offsets = [watchdigest.get_check_offset(f"docker.io/team/app{index}:latest", HOURLY) for index in range(1200)]
+    buckets = [0] * 12
+    for offset in offsets:
+        buckets[offset * 12 // HOURLY] += 1
+
+    # 100 images per five-minute bucket on average; no bucket is empty or holds a burst.
+    assert min(buckets) > 50 and max(buckets) < 150
+    assert len(set(offsets)) > 1000
+
+
+def test_check_slots_advance_by_interval(monkeypatch):
+    monkeypatch.setattr(watchdigest, "check_intervals", dict(watchdigest.default_check_intervals))
+    image = "docker.io/library/nginx:latest"
+    offset = watchdigest.get_check_offset(image, HOURLY)
+    now = 1_700_000_000.0
+
+    slot = watchdigest.get_last_check_slot(image, now)
+    assert slot <= now < slot + HOURLY
+    assert (slot - offset) % HOURLY == 0
+    assert watchdigest.get_last_check_slot(image, slot + HOURLY) == slot + HOURLY
@@ -0,0 +1,96 @@
+import watchdigest
+
+
+def lookup(registry, repository="team/app"):
+    return watchdigest.get_registry_digest(watchdigest.parse_image_reference(f"{registry.host}/{repository}:1.0"))
+
+
+def open_breaker(host, age):
+    breaker = watchdigest.get_registry_breaker(host)
+    breaker.failures, breaker.opened_at = breaker.threshold, watchdigest.time.time() - age
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(make_registry, monkeypatch):
+    monkeypatch.setattr(watchdigest, "get_retry_delay", lambda response, attempt: 0)
+    registry = make_registry(rate_limit=1.0)
+    breaker = watchdigest.get_registry_breaker(registry.host)
+
+    for _ in range(breaker.threshold):
+        assert lookup(registry) == ""
+    requests_sent = sum(registry.requests.values())
+
+    assert breaker.opened_at is not None
+    assert lookup(registry) is None
+    assert sum(registry.requests.values()) == requests_sent
+
+
+def test_not_found_is_not_a_failure(make_registry):
+    registry = make_registry()
+    registry.server.RequestHandlerClass.do_GET = lambda handler: handler.reply(404)
+
+    for _ in range(5):
+        assert lookup(registry) == ""
+    assert watchdigest.get_registry_breaker(registry.host).opened_at is None
+
+
+def test_successful_probe_closes_breaker(make_registry):
+    registry = make_registry()
+    breaker = open_breaker(registry.host, age=3600)
+
+    assert lookup(registry)
+    assert breaker.opened_at is None and not breaker.probing and breaker.failures == 0
+
+
+def test_breaker_short_circuits_during_cooldown(make_registry):
+    registry = make_registry()
+    open_breaker(registry.host, age=0)
+
+    assert lookup(registry) is None
+    assert watchdigest.get_registry_json(watchdigest.parse_image_reference(f"{registry.host}/team/app:1.0"), "manifests/1.0") is None
+    assert sum(registry.requests.values()) == 0
+
+
+def test_unexpected_error_resolves_probe(make_registry, monkeypatch):
+    registry = make_registry()
+    breaker = open_breaker(registry.host, age=3600)
+    cooldown = breaker.cooldown
+
+    def broken_auth(host, repository):
+        raise KeyError("realm")
+
+    monkeypatch.setattr(watchdigest, "get_registry_auth_header", broken_auth)
+    reference = watchdigest.parse_image_reference(f"{registry.host}/team/app:1.0")
+
+    assert watchdigest.get_registry_digest(reference) == ""
+    assert not breaker.probing
+    assert breaker.cooldown == cooldown * 2
+
+    for fetch in (lambda: watchdigest.get_registry_json(reference, "manifests/1.0"), lambda: watchdigest.get_registry_tags(reference)):
+        breaker.opened_at = watchdigest.time.time() - 3600 * 24
+        assert fetch() is None
+        assert not breaker.probing
+
+
+def test_failing_token_endpoint_is_a_failure(make_registry):
+    registry = make_registry()
+    handler = registry.server.RequestHandlerClass
+    do_get = handler.do_GET
+    handler.do_GET = lambda self: self.reply(503) if self.path.startswith("/token") else do_get(self)
+    breaker = watchdigest.get_registry_breaker(registry.host)
+
+    for _ in range(breaker.threshold):
+        assert lookup(registry) == ""
+
+    assert breaker.opened_at is not None
+    assert registry.requests["manifest"] == 0
+
+
+def test_rejected_token_request_is_not_a_failure(make_registry):
+    registry = make_registry(credentials=("user", "secret"))
+
+    for _ in range(5):
+        assert lookup(registry) == ""
+
+    assert len(registry.token_requests) == 5
+    assert watchdigest.get_registry_breaker(registry.host).opened_at is None
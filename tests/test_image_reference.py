@@ -0,0 +1,90 @@
+import pytest
+from hypothesis import given, strategies as st
+
+import watchdigest
+from watchdigest import ImageReference, parse_image_reference
+
+components = st.from_regex(r"[a-z0-9]+(?:[_-][a-z0-9]+)*", fullmatch=True)
+hosts = st.one_of(
+    st.just("localhost"),
+    st.from_regex(r"[a-z0-9]+(?:-[a-z0-9]+)*(?:\.[a-z0-9]+)+", fullmatch=True),
+)
+registries = st.one_of(
+    st.none(),
+    hosts,
+    st.builds("{}:{}".format, hosts, st.integers(1, 65535)),
+)
+tags = st.from_regex(r"[A-Za-z0-9_][A-Za-z0-9_.-]{0,40}", fullmatch=True)
+digests = st.from_regex(r"sha256:[0-9a-f]{64}", fullmatch=True)
+
+
+@st.composite
+def references(draw):
+    """Return an image reference string and the ImageReference it should parse to."""
+    registry = draw(registries)
+    path = draw(st.lists(components, min_size=1, max_size=4))
+    tag = draw(st.one_of(st.none(), tags))
+    digest = draw(st.one_of(st.none(), digests))
+
+    text = "/".join(([registry] if registry else []) + path)
+    text += f":{tag}" if tag else ""
+    text += f"@{digest}" if digest else ""
+
+    repository = "/".join(path)
+    if registry is None:
+        registry = "docker.io"
+        if len(path) == 1:
+            repository = f"library/{repository}"
+    return text, ImageReference(registry, repository, tag or ("" if digest else "latest"), digest or "")
+
+
+@given(references())
+def test_parse_components(case):
+    text, expected = case
+    assert parse_image_reference(text) == expected
+
+
+@given(references())
+def test_round_trip_through_name_and_short_name(case):
+    reference = parse_image_reference(case[0])
+    # A tag takes precedence over the digest in name and short_name.
+    expected = reference._replace(digest="") if reference.tag else reference
+
+    assert parse_image_reference(reference.name) == expected
+    assert parse_image_reference(reference.short_name) == expected
+    assert parse_image_reference(reference.display_name) == expected
+
+
+@given(references(), st.from_regex(r"(?!sha256:)[a-z0-9]+:[0-9a-f]{1,64}", fullmatch=True))
+def test_other_digest_algorithms_are_rejected(case, digest):
+    with pytest.raises(ValueError):
+        parse_image_reference(f"{case[0].partition('@')[0]}@{digest}")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("nginx", ("docker.io", "library/nginx", "latest", "")),
+    ("docker.io/nginx:1.27", ("docker.io", "library/nginx", "1.27", "")),
+    ("index.docker.io/nginx", ("docker.io", "library/nginx", "latest", "")),
+    ("bitnami/redis:7.2", ("docker.io", "bitnami/redis", "7.2", "")),
+    ("localhost:5000/app:1.0", ("localhost:5000", "app", "1.0", "")),
+    ("localhost/app", ("localhost", "app", "latest", "")),
+    ("registry.example:5000/team/app", ("registry.example:5000", "team/app", "latest", "")),
+    ("registry.gitlab.com/group/sub/app:tag", ("registry.gitlab.com", "group/sub/app", "tag", "")),
+    ("ghcr.io/owner/app@sha256:" + "a" * 64, ("ghcr.io", "owner/app", "", "sha256:" + "a" * 64)),
+    ("app:1.0@sha256:" + "b" * 64, ("docker.io", "library/app", "1.0", "sha256:" + "b" * 64)),
+])
+def test_examples(text, expected):
+    assert parse_image_reference(text) == ImageReference(*expected)
+
+
+@pytest.mark.parametrize("text", ["", "nginx:", "a//b", "/nginx", "nginx/", "x@md5:abc", "@sha256:" + "a" * 64, "localhost:5000/"])
+def test_invalid_references(text):
+    with pytest.raises(ValueError):
+        parse_image_reference(text)
+
+
+def test_display_names():
+    assert parse_image_reference("nginx:1.27").display_name == "nginx:1.27"
+    assert parse_image_reference("nginx:1.27").short_name == "library/nginx:1.27"
+    assert parse_image_reference("ghcr.io/owner/app:1").display_name == "ghcr.io/owner/app:1"
+    assert watchdigest.normalize_image_tag("nginx@sha256:" + "c" * 64, False) == "local/nginx:<none>"
@@ -0,0 +1,52 @@
+import pytest
+
+import watchdigest
+from benchmark import FakeDockerDaemon
+
+
+@pytest.fixture
+def node(make_registry, use_daemon):
+    """A node with one outdated image used by two standalone containers."""
+    registry = make_registry(outdated_ratio=1.0)
+    daemon = FakeDockerDaemon(registry, images=1, containers=2)
+    use_daemon(daemon)
+    watchdigest.list_of_outdated_images = watchdigest.get_outdated_digests()
+    image = watchdigest.list_of_outdated_images[0]["image"]
+    return registry, daemon, image, registry.remote_digest("bench/image0", "latest")
+
+
+def container_digests(daemon):
+    return {container.image.attrs["RepoDigests"][0].split("@")[1] for container in daemon.containers_by_name.values()}
+
+
+def test_outdated_entries_carry_remote_digest(node):
+    registry, daemon, image, remote_digest = node
+
+    assert {entry["digest"] for entry in watchdigest.list_of_outdated_images} == {remote_digest}
+
+
+def test_prefetched_image_is_used_when_digest_matches(node):
+    registry, daemon, image, remote_digest = node
+    watchdigest.prefetch_image(watchdigest.parse_image_reference(image), remote_digest)
+    daemon.requests.clear()
+
+    assert watchdigest.pull_and_restart_outdated_images()
+
+    assert daemon.requests["image_pull"] == 0
+    assert daemon.requests["image_tag"] == 1
+    assert container_digests(daemon) == {remote_digest}
+
+
+def test_stale_prefetched_image_is_not_installed(node):
+    registry, daemon, image, remote_digest = node
+    stale_digest = "sha256:" + "0" * 64
+    watchdigest.prefetch_image(watchdigest.parse_image_reference(image), stale_digest)
+    assert watchdigest.prefetched_images[image] == stale_digest
+    daemon.requests.clear()
+
+    assert watchdigest.pull_and_restart_outdated_images()
+
+    assert daemon.requests["image_pull"] == 1
+    assert daemon.requests["image_tag"] == 0
+    assert container_digests(daemon) == {remote_digest}
+    assert image not in watchdigest.prefetched_images
@@ -0,0 +1,43 @@
+import docker
+
+import watchdigest
+
+OUTDATED = [
+    {"container_name": "web", "image": "library/nginx:latest"},
+    {"container_name": "db", "image": "library/postgres:16"},
+]
+
+
+def fake_plan(sizes):
+    return lambda entries: {"images": [{"image": image, "download_bytes": size} for image, size in sizes.items()]}
+
+
+def test_pull_limit_drops_large_images(monkeypatch):
+    monkeypatch.setattr(watchdigest, "max_pull_mb", 100)
+    monkeypatch.setattr(watchdigest, "plan_upgrade", fake_plan({"library/nginx:latest": 50 * 2**20, "library/postgres:16": 150 * 2**20}))
+
+    assert watchdigest.apply_pull_limit(OUTDATED) == OUTDATED[:1]
+
+
+def test_pull_limit_keeps_images_of_unknown_size(monkeypatch):
+    monkeypatch.setattr(watchdigest, "max_pull_mb", 100)
+    monkeypatch.setattr(watchdigest, "plan_upgrade", fake_plan({"library/nginx:latest": None, "library/postgres:16": None}))
+
+    assert watchdigest.apply_pull_limit(OUTDATED) == OUTDATED
+
+
+def test_pull_limit_disabled(monkeypatch):
+    monkeypatch.setattr(watchdigest, "max_pull_mb", 0)
+    monkeypatch.setattr(watchdigest, "plan_upgrade", None)
+
+    assert watchdigest.apply_pull_limit(OUTDATED) == OUTDATED
+
+
+def test_pull_limit_ignores_docker_errors(monkeypatch):
+    def failing_plan(entries):
+        raise docker.errors.DockerException("daemon unavailable")
+
+    monkeypatch.setattr(watchdigest, "max_pull_mb", 100)
+    monkeypatch.setattr(watchdigest, "plan_upgrade", failing_plan)
+
+    assert watchdigest.apply_pull_limit(OUTDATED) == OUTDATED
@@ -0,0 +1,140 @@
+import base64
+import json
+
+import pytest
+
+import watchdigest
+from benchmark import make_digest
+
+
+def write_docker_config(tmp_path, auths):
+    (tmp_path / "config.json").write_text(json.dumps({"auths": auths}))
+
+
+def lookup(registry, repository="team/app", tag="1.0"):
+    return watchdigest.get_registry_digest(watchdigest.parse_image_reference(f"{registry.host}/{repository}:{tag}"))
+
+
+def expected_digest(registry, repository="team/app", tag="1.0"):
+    return make_digest(f"{registry.host}/{repository}:{tag}")
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('Bearer realm="https://auth.example/token",service="registry.example",scope="a,b"',
+     {"scheme": "bearer", "realm": "https://auth.example/token", "service": "registry.example", "scope": "a,b"}),
+    ("Bearer realm=https://auth.example/token,service=registry.example",
+     {"scheme": "bearer", "realm": "https://auth.example/token", "service": "registry.example"}),
+    ('Basic realm="Registry Realm"', {"scheme": "basic", "realm": "Registry Realm"}),
+])
+def test_parse_www_authenticate(header, expected):
+    assert watchdigest.parse_www_authenticate(header) == expected
+
+
+def test_bearer_challenge_is_discovered_once_and_token_cached(make_registry):
+    registry = make_registry()
+
+    assert lookup(registry) == expected_digest(registry)
+    assert lookup(registry) == expected_digest(registry)
+
+    assert registry.requests["ping"] == 1
+    assert registry.requests["token"] == 1
+    assert watchdigest.registry_challenges[registry.host]["scheme"] == "bearer"
+
+
+def test_tokens_are_scoped_per_repository(make_registry):
+    registry = make_registry()
+
+    lookup(registry, "team/app")
+    lookup(registry, "team/other")
+
+    assert registry.requests["token"] == 2
+    assert "scope=repository%3Ateam%2Fapp%3Apull" in registry.token_requests[0][0]
+    assert "service=benchmark" in registry.token_requests[0][0]
+
+
+def test_expired_token_is_renewed(make_registry):
+    registry = make_registry(token_body=json.dumps({"access_token": "benchmark", "expires_in": 5}).encode())
+
+    lookup(registry)
+    lookup(registry)
+
+    assert registry.requests["token"] == 2
+
+
+def test_bearer_token_request_uses_docker_credentials(make_registry, tmp_path):
+    registry = make_registry(credentials=("robot", "s3cret"))
+    write_docker_config(tmp_path, {registry.host: {"auth": base64.b64encode(b"robot:s3cret").decode()}})
+
+    assert lookup(registry) == expected_digest(registry)
+    assert registry.token_requests[0][1] == f"Basic {base64.b64encode(b'robot:s3cret').decode()}"
+
+
+def test_bearer_token_request_without_credentials_fails(make_registry):
+    registry = make_registry(credentials=("robot", "s3cret"))
+
+    assert lookup(registry) == ""
+    assert registry.requests["manifest"] == 0
+
+
+def test_basic_auth_uses_docker_credentials(make_registry, tmp_path):
+    registry = make_registry(auth="basic", credentials=("robot", "s3cret"))
+    write_docker_config(tmp_path, {f"https://{registry.host}": {"username": "robot", "password": "s3cret"}})
+
+    assert lookup(registry) == expected_digest(registry)
+    assert registry.requests["token"] == 0
+    assert watchdigest.registry_challenges[registry.host]["scheme"] == "basic"
+
+
+def test_basic_auth_without_credentials_fails(make_registry):
+    registry = make_registry(auth="basic", credentials=("robot", "s3cret"))
+
+    assert lookup(registry) == ""
+    assert registry.requests["manifest"] == 0
+
+
+def test_anonymous_registry(make_registry):
+    registry = make_registry(auth="none")
+
+    assert lookup(registry) == expected_digest(registry)
+    assert watchdigest.registry_challenges[registry.host] == {"scheme": None}
+
+
+def test_unquoted_challenge(make_registry):
+    registry = make_registry()
+    registry.challenge = f"Bearer realm=http://{registry.host}/token,service=benchmark"
+
+    assert lookup(registry) == expected_digest(registry)
+
+
+@pytest.mark.parametrize("challenge, token_body", [
+    ('Bearer service="benchmark"', None),
+    (None, b"not json"),
+    (None, b'["token"]'),
+])
+def test_broken_bearer_auth_is_an_error_not_an_exception(make_registry, challenge, token_body):
+    registry = make_registry(challenge=challenge, token_body=token_body)
+
+    assert lookup(registry) == ""
+
+
+def test_docker_config_auths(tmp_path):
+    write_docker_config(tmp_path, {
+        "https://index.docker.io/v1/": {"auth": base64.b64encode(b"hub:pa:ss").decode()},
+        "ghcr.io": {"username": "gh", "password": "token"},
+        "registry.example:5000": {"auth": base64.b64encode(b"me:pw").decode()},
+        "no-credentials.example": {},
+    })
+
+    assert watchdigest.load_docker_credentials() == {
+        "registry-1.docker.io": ("hub", "pa:ss"),
+        "ghcr.io": ("gh", "token"),
+        "registry.example:5000": ("me", "pw"),
+    }
+
+
+def test_docker_config_missing_or_invalid(tmp_path):
+    assert watchdigest.load_docker_credentials() == {}
+
+    watchdigest.docker_credentials = None
+    (tmp_path / "config.json").write_text("{not json")
+    assert watchdigest.load_docker_credentials() == {}
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+
+import watchdigest
+
+
+@pytest.fixture
+def make_ring(tmp_path):
+    """Return a factory opening RingLogHandler instances on one file, closed after the test."""
+    handlers = []
+
+    def make(capacity=4, slot_size=64):
+        handler = watchdigest.RingLogHandler(tmp_path / "logs.ring", capacity=capacity, slot_size=slot_size)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        if not handler.map.closed:
+            handler.close()
+
+
+def emit(handler, message, created, level=logging.INFO):
+    handler.handle(logging.makeLogRecord({"msg": message, "levelno": level, "levelname": logging.getLevelName(level), "created": created}))
+
+
+def test_wrap_around_keeps_newest_records(make_ring):
+    ring = make_ring(capacity=4)
+    for i in range(10):
+        emit(ring, f"record {i}", 100 + i)
+
+    assert ring.get_logs() == [f"INFO record {i}" for i in range(6, 10)]
+    assert ring.get_logs(since=107) == ["INFO record 7", "INFO record 8", "INFO record 9"]
+
+
+def test_out_of_order_timestamps_stay_searchable(make_ring):
+    ring = make_ring(capacity=8)
+    for message, created in [("a", 100), ("b", 105), ("c", 103), ("d", 110)]:
+        emit(ring, message, created)
+
+    assert ring.get_logs(since=104) == ["INFO b", "INFO c", "INFO d"]
+    assert ring.get_logs(until=104) == ["INFO a"]
+
+
+def test_reopen_keeps_records(make_ring):
+    ring = make_ring()
+    emit(ring, "kept", 100)
+    ring.close()
+
+    assert make_ring().get_logs() == ["INFO kept"]
+
+
+def test_reopen_with_different_size_resets(make_ring):
+    ring = make_ring(capacity=4)
+    emit(ring, "old", 100)
+    ring.close()
+
+    ring = make_ring(capacity=8)
+    assert ring.get_logs() == []
+    emit(ring, "new", 200)
+    assert ring.get_logs() == ["INFO new"]
+
+
+def test_level_range_and_limit_filters(make_ring):
+    ring = make_ring(capacity=8)
+    emit(ring, "debug", 100, logging.DEBUG)
+    emit(ring, "info", 101)
+    emit(ring, "warning", 102, logging.WARNING)
+    emit(ring, "error", 103, logging.ERROR)
+    emit(ring, "late", 104)
+
+    assert ring.get_logs(level=logging.WARNING) == ["WARNING warning", "ERROR error"]
+    assert ring.get_logs(since=101, until=103) == ["INFO info", "WARNING warning", "ERROR error"]
+    assert ring.get_logs(since=101, until=103, level=logging.WARNING, limit=1) == ["ERROR error"]
+    assert ring.get_logs(limit=2) == ["ERROR error", "INFO late"]
+
+
+def test_truncation_drops_partial_utf8(make_ring):
+    ring = make_ring(slot_size=watchdigest.RingLogHandler.slot.size + 6)
+    emit(ring, "abcé€", 100)
+
+    assert ring.get_logs() == ["INFO abcé"]
@@ -0,0 +1,75 @@
+import pytest
+
+import watchdigest
+from benchmark import FakeDockerDaemon
+
+
+@pytest.fixture
+def swarm(make_registry, use_daemon, monkeypatch):
+    """A node running three outdated Swarm services with four replicas each."""
+    registry = make_registry(outdated_ratio=1.0)
+    daemon = FakeDockerDaemon(registry, images=3, containers=0, services=3, replicas=4)
+    use_daemon(daemon)
+    monkeypatch.setattr(watchdigest, "swarm_mode", True)
+    return registry, daemon
+
+
+def test_services_are_tracked_once_regardless_of_replicas(swarm):
+    records = watchdigest.get_non_dangling_images()
+
+    assert sorted(name for record in records for name in record.container_name) == ["service00000", "service00001", "service00002"]
+    assert all(record.service for record in records)
+
+
+def test_api_plan_lists_services(swarm):
+    watchdigest.get_outdated_digests_list()
+    client = watchdigest.create_app().test_client()
+
+    plan = client.get("/api/plan").get_json()
+
+    assert sorted(entry["service"] for entry in plan["swarm_services"]) == ["service00000", "service00001", "service00002"]
+    assert plan["images"] == []
+    assert plan["containers"] == 0
+    assert plan["expected_downtime_seconds"] == 0
+
+
+def test_upgrade_pins_new_digest_through_service_update(swarm, monkeypatch):
+    registry, daemon = swarm
+    monkeypatch.setattr(watchdigest, "list_of_outdated_images", watchdigest.get_outdated_digests())
+
+    assert watchdigest.pull_and_restart_outdated_images()
+
+    assert daemon.requests["service_update"] == 3
+    assert daemon.requests["image_pull"] == 0 and daemon.requests["container_run"] == 0
+    for index, service in enumerate(sorted(daemon.services_by_name)):
+        spec = daemon.services_by_name[service].attrs["Spec"]
+        assert spec["TaskTemplate"]["ContainerSpec"]["Image"] == f"{registry.host}/bench/image{index}:latest@{registry.remote_digest(f'bench/image{index}', 'latest')}"
+        assert spec["UpdateConfig"]["Parallelism"] == watchdigest.swarm_parallelism
+
+
+def test_unpinned_service_is_unable_to_check(swarm):
+    registry, daemon = swarm
+    spec = daemon.services_by_name["service00000"].attrs["Spec"]["TaskTemplate"]["ContainerSpec"]
+    spec["Image"] = spec["Image"].split("@")[0]
+
+    watchdigest.get_outdated_digests_list()
+    statuses = {record.container_name[0]: record.status for record in watchdigest.docker_image_data}
+
+    assert statuses == {"service00000": "unable", "service00001": "outdated", "service00002": "outdated"}
+    assert sorted(entry["container_name"] for entry in watchdigest.get_outdated_digests()) == ["service00001", "service00002"]
+
+    requests_sent = sum(registry.requests.values())
+    watchdigest.checkonly_container_images()
+    assert sum(registry.requests.values()) == requests_sent
+
+
+def test_previous_rollout_status_is_not_accepted(swarm, monkeypatch):
+    registry, daemon = swarm
+    for service in daemon.services_by_name.values():
+        service.attrs["UpdateStatus"] = {"State": "completed", "StartedAt": "2024-12-31T00:00:00Z"}
+    monkeypatch.setattr(daemon.api, "update_service", lambda *args, **kwargs: daemon.count("service_update"))
+    monkeypatch.setattr(watchdigest, "list_of_outdated_images", watchdigest.get_outdated_digests())
+
+    assert not watchdigest.pull_and_restart_outdated_images()
+
+    assert daemon.requests["service_update"] == 3
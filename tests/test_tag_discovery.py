@@ -0,0 +1,72 @@
+import pytest
+
+import watchdigest
+
+POSTGRES_TAGS = ["16.1", "16.2", "16.9", "16.10", "16.10-alpine", "17.0", "17.0-alpine", "16.2-alpine", "16.3-alpine", "latest", "16"]
+
+
+def reference(registry, tag, repository="library/postgres"):
+    return watchdigest.parse_image_reference(f"{registry.host}/{repository}:{tag}")
+
+
+@pytest.mark.parametrize("tag, newer", [
+    ("16.2", "16.10"),
+    ("16.10", ""),
+    ("16.2-alpine", "16.10-alpine"),
+    ("17.0", ""),
+    ("16", ""),
+    ("latest", ""),
+])
+def test_newer_tag_matching(make_registry, tag, newer):
+    registry = make_registry(tags={"library/postgres": POSTGRES_TAGS})
+
+    assert watchdigest.get_newer_tag(reference(registry, tag)) == newer
+
+
+def test_tags_follow_link_pagination(make_registry):
+    tags = [f"1.{minor}.0" for minor in range(25)]
+    registry = make_registry(tags={"team/app": tags}, tag_page_size=10)
+
+    assert sorted(watchdigest.get_registry_tags(reference(registry, "1.0.0", "team/app"))) == sorted(tags)
+    assert registry.requests["tags"] == 3
+
+
+def test_tag_index_is_reused_within_ttl_and_refreshed_after(make_registry, monkeypatch):
+    registry = make_registry(tags={"library/postgres": ["16.2", "16.3"]})
+    ref = reference(registry, "16.2")
+
+    assert watchdigest.get_newer_tag(ref) == "16.3"
+    registry.tags["library/postgres"].append("16.4")
+    assert watchdigest.get_newer_tag(ref) == "16.3"
+    assert registry.requests["tags"] == 1
+
+    key = (registry.host, "library/postgres")
+    fetched_at, index = watchdigest.registry_tag_cache[key]
+    watchdigest.registry_tag_cache[key] = (fetched_at - watchdigest.tag_cache_ttl * 60 - 1, index)
+
+    assert watchdigest.get_newer_tag(ref) == "16.4"
+    assert registry.requests["tags"] == 2
+
+
+def test_stale_tag_index_is_reused_when_refresh_fails(make_registry):
+    registry = make_registry(tags={"library/postgres": ["16.2", "16.3"]})
+    ref = reference(registry, "16.2")
+    assert watchdigest.get_newer_tag(ref) == "16.3"
+
+    key = (registry.host, "library/postgres")
+    fetched_at, index = watchdigest.registry_tag_cache[key]
+    watchdigest.registry_tag_cache[key] = (fetched_at - watchdigest.tag_cache_ttl * 60 - 1, index)
+    handler = registry.server.RequestHandlerClass
+    do_get = handler.do_GET
+    handler.do_GET = lambda self: self.reply(503) if "/tags/list" in self.path else do_get(self)
+
+    assert watchdigest.get_newer_tag(ref) == "16.3"
+    assert watchdigest.get_registry_breaker(registry.host).failures == 1
+
+
+def test_failed_first_fetch_finds_no_tag(make_registry):
+    registry = make_registry(tags={"library/postgres": ["16.2", "16.3"]})
+    registry.server.RequestHandlerClass.do_GET = lambda handler: handler.reply(503)
+
+    assert watchdigest.get_newer_tag(reference(registry, "16.2")) == ""
+    assert (registry.host, "library/postgres") not in watchdigest.registry_tag_cache
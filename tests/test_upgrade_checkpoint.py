@@ -0,0 +1,142 @@
+import json
+import os
+
+import docker
+import pytest
+
+import watchdigest
+from benchmark import FakeDockerDaemon
+
+
+@pytest.fixture
+def node(request, make_registry, use_daemon):
+    """A node with six images (or as parametrized), most of them outdated, each used by two standalone containers."""
+    images = getattr(request, "param", 6)
+    registry = make_registry(outdated_ratio=0.5)
+    daemon = FakeDockerDaemon(registry, images=images, containers=2 * images)
+    use_daemon(daemon)
+    return registry, daemon
+
+
+def crash_on_run(daemon, monkeypatch, after):
+    """Make the daemon die right after removing a container, as a host reboot would."""
+    run = daemon.containers.run
+    calls = []
+
+    def crashing_run(**kwargs):
+        calls.append(kwargs["name"])
+        if len(calls) > after:
+            raise KeyboardInterrupt("host reboot")
+        return run(**kwargs)
+
+    monkeypatch.setattr(daemon.containers, "run", crashing_run)
+    return run
+
+
+def read_checkpoint():
+    with open(watchdigest.file_checkpoint) as file:
+        return json.load(file)
+
+
+def test_interrupted_upgrade_resumes_other_images(node, monkeypatch):
+    registry, daemon = node
+    outdated = watchdigest.get_outdated_digests()
+    images = {entry["image"] for entry in outdated}
+    assert len(images) > 1
+    watchdigest.list_of_outdated_images = outdated
+
+    run = crash_on_run(daemon, monkeypatch, after=1)
+    with pytest.raises(KeyboardInterrupt):
+        watchdigest.pull_and_restart_outdated_images()
+    monkeypatch.setattr(daemon.containers, "run", run)
+
+    states = [state for step in read_checkpoint()["images"].values() for state in step["containers"].values()]
+    assert states.count("done") == 1
+    # The moved tag hides the stranded containers from detection.
+    assert len(watchdigest.get_outdated_digests()) < len(outdated)
+
+    daemon.requests.clear()
+    watchdigest.maintain_container_images()
+
+    assert not os.path.exists(watchdigest.file_checkpoint)
+    assert watchdigest.get_outdated_digests() == []
+    # The image pulled before the crash is reused.
+    assert daemon.requests["image_pull"] == len(images) - 1
+    assert sorted(daemon.containers_by_name) == [f"container{index:05d}" for index in range(12)]
+
+
+def test_failed_pull_does_not_block_other_images(node, monkeypatch):
+    registry, daemon = node
+    watchdigest.list_of_outdated_images = watchdigest.get_outdated_digests()
+    failing = sorted({entry["image"] for entry in watchdigest.list_of_outdated_images})[0]
+    pull = daemon.images.pull
+
+    def failing_pull(reference):
+        if reference == failing:
+            raise docker.errors.APIError("registry error")
+        return pull(reference)
+
+    monkeypatch.setattr(daemon.images, "pull", failing_pull)
+
+    assert not watchdigest.pull_and_restart_outdated_images()
+
+    remaining = watchdigest.get_outdated_digests()
+    assert {entry["image"] for entry in remaining} == {failing}
+    checkpoint = read_checkpoint()["images"]
+    assert list(checkpoint) == [failing]
+    assert checkpoint[failing]["attempts"] == 1
+
+
+def test_failing_image_is_dropped_after_max_attempts(node, monkeypatch):
+    registry, daemon = node
+    monkeypatch.setattr(daemon.images, "pull", lambda reference: (_ for _ in ()).throw(docker.errors.APIError("down")))
+    watchdigest.list_of_outdated_images = watchdigest.get_outdated_digests()
+
+    for _ in range(watchdigest.max_upgrade_attempts - 1):
+        watchdigest.pull_and_restart_outdated_images()
+        assert os.path.exists(watchdigest.file_checkpoint)
+    watchdigest.pull_and_restart_outdated_images()
+
+    assert not os.path.exists(watchdigest.file_checkpoint)
+
+
+def test_library_images_match_unprefixed_tags(node, monkeypatch):
+    registry, daemon = node
+    image = next(iter(daemon.images_by_id.values()))
+    image.tags = ["nginx:latest"]
+    monkeypatch.setattr(daemon.images, "pull", lambda reference: image)
+    run = []
+    monkeypatch.setattr(daemon.containers, "run", lambda **kwargs: run.append(kwargs["image"]))
+    watchdigest.list_of_outdated_images = [{"container_name": "container00000", "image": "library/nginx:latest"}]
+
+    assert watchdigest.pull_and_restart_outdated_images()
+    assert run == ["library/nginx:latest"]
+
+
+@pytest.mark.parametrize("node", [2], indirect=True)
+def test_scheduled_window_resumes_checkpoint_with_nothing_outdated(node, monkeypatch):
+    registry, daemon = node
+    outdated = watchdigest.list_of_outdated_images = watchdigest.get_outdated_digests()
+    assert len(outdated) == 2 and len({entry["image"] for entry in outdated}) == 1
+
+    run = crash_on_run(daemon, monkeypatch, after=0)
+    with pytest.raises(KeyboardInterrupt):
+        watchdigest.pull_and_restart_outdated_images()
+    monkeypatch.setattr(daemon.containers, "run", run)
+
+    # The tag has moved and one container is gone: detection sees nothing to upgrade.
+    assert watchdigest.get_outdated_digests() == []
+    assert len(daemon.containers_by_name) == 3
+
+    watchdigest.maintain_container_images()
+
+    assert not os.path.exists(watchdigest.file_checkpoint)
+    assert len(daemon.containers_by_name) == 4
+    upgraded = {daemon.containers_by_name[entry["container_name"]].image.id for entry in outdated}
+    assert upgraded == {daemon.images.get(outdated[0]["image"]).id}
+
+
+def test_checkpoint_is_private(node):
+    watchdigest.save_upgrade_checkpoint({"images": {"example/app:latest": {"run_args": {"environment": ["TOKEN=secret"]}}}})
+
+    assert os.stat(watchdigest.file_checkpoint).st_mode & 0o777 == 0o600
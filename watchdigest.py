@@ -3,43 +3,111 @@
 # Copyright (c) 2025 2boom.
 
 import json
-import docker
+import re
+import argparse
+import base64
+import hashlib
+import importlib
 import os
+import mmap
+import struct
+import bisect
 import time
 import sys
 import socket
-import requests
 import logging
 import platform
 import subprocess
 import schedule
 import random
 import threading
-from typing import List, Dict
+from typing import List, Dict, NamedTuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from schedule import every, repeat, run_pending
 from collections import deque
-from docker.errors import APIError, NotFound, DockerException
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 from datetime import datetime, time as dtime, timedelta
-from flask import Flask, render_template, jsonify, request, Response, make_response
-from flask_cors import CORS  # Added CORS support
-from requests.exceptions import (
-    HTTPError,
-    Timeout,
-    ConnectionError,
-    RequestException
-)
 
 default_start_times = ["03:00"]
 upgrade_mode = True
 notify_enabled = False
 default_dot_style = True
 next_run_time, next_run_time_check = 'N/A', 'N/A'
+h1_string = 'N/A'
 default_compose_files = ['compose.yaml', 'compose.yml', 'docker-compose.yaml', 'docker-compose.yml']
 list_of_outdated_images = []
-start_times_outdate_check = []
+default_check_intervals = {"rolling": 60, "major": 360, "pinned": 1440}
+check_intervals = dict(default_check_intervals)
+config_mtime = None
+config_reload_interval = 30
+notification_keys = ["platform_webhook_url", "platform_header", "platform_payload", "platform_format_message"]
+platform_webhook_url, platform_header, platform_payload, platform_format_message = [], [], [], []
+image_last_checked = {}
+image_retry_at = {}
+last_inventory_check = 0.0
 docker_image_data = []
 old_list = []
+registry_timeout = (5, 30)
+registry_hosts = {
+    "docker.io": "registry-1.docker.io",
+    "registry.hub.docker.com": "registry-1.docker.io",
+    "lscr.io": "ghcr.io",
+}
+known_registry_challenges = {
+    "registry-1.docker.io": {"scheme": "bearer", "realm": "https://auth.docker.io/token", "service": "registry.docker.io"},
+    "ghcr.io": {"scheme": "bearer", "realm": "https://ghcr.io/token", "service": "ghcr.io"},
+    "registry.gitlab.com": {"scheme": "bearer", "realm": "https://gitlab.com/jwt/auth", "service": "container_registry"},
+}
+registry_challenges = dict(known_registry_challenges)
+registry_tokens = {}
+registry_breakers = {}
+docker_credentials = None
+manifest_media_types = [
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+max_pull_mb = 0
+restart_downtime = 10
+upgrade_post_wait = 20
+max_upgrade_attempts = 3
+prefetch_enabled = False
+prefetch_concurrency = 1
+prefetch_state = {}
+prefetched_images = {}
+prefetch_executor = None
+prefetch_lock = threading.Lock()
+swarm_mode = False
+swarm_parallelism = 1
+swarm_update_timeout = 600
+tag_discovery = False
+tag_cache_ttl = 360
+registry_tag_cache = {}
+version_tag_pattern = re.compile(r"^(v?)(\d+(?:\.\d+){1,2})([-_][A-Za-z][\w.-]*)?$")
+dots = {"orange": "\U0001F7E0", "green": "\U0001F7E2", "red": "\U0001F534", "yellow": "\U0001F7E1", "white": "\U000026AA"}
+square_dots = {"orange": "\U0001F7E7", "green": "\U0001F7E9", "red": "\U0001F7E5", "yellow": "\U0001F7E8", "white": "\U0001F533"}
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+docker = LazyModule("docker")
+requests = LazyModule("requests")
+
 
 class LimitedMemoryHandler(logging.Handler):
     def __init__(self, capacity=1000):
@@ -50,8 +118,213 @@ class LimitedMemoryHandler(logging.Handler):
         formatted_message = self.format(record)
         self.log_buffer.append(formatted_message)
 
-    def get_logs(self):
-        return list(self.log_buffer)
+    def get_logs(self, since=None, until=None, level=logging.NOTSET, limit=None):
+        """Return the buffered lines; the in-memory buffer keeps formatted text only and cannot be filtered."""
+        logs = list(self.log_buffer)
+        return logs[-limit:] if limit else logs
+
+
+class RingLogHandler(logging.Handler):
+    """Logging handler that keeps raw records in a fixed-size, memory-mapped ring file.
+
+    Each record takes one slot (timestamp, level, message); formatting happens on read.
+    Record timestamps can go backwards (threads, clock adjustments), so a stored timestamp
+    is never earlier than the previous slot's. That keeps slots sorted for binary search.
+    """
+    magic = b"WDRING01"
+    header = struct.Struct("<8sIIQ")
+    slot = struct.Struct("<dBH")
+
+    def __init__(self, path, capacity=8192, slot_size=512):
+        super().__init__()
+        self.capacity = capacity
+        self.slot_size = slot_size
+        size = self.header.size + capacity * slot_size
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, stored_capacity, stored_slot_size, self.written = self.header.unpack_from(self.map, 0)
+        if (magic, stored_capacity, stored_slot_size) != (self.magic, capacity, slot_size):
+            self.written = 0
+            self.header.pack_into(self.map, 0, self.magic, capacity, slot_size, self.written)
+
+    def _offset(self, index):
+        return self.header.size + (index % self.capacity) * self.slot_size
+
+    def _created(self, index):
+        return self.slot.unpack_from(self.map, self._offset(index))[0]
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            if record.exc_info:
+                message = f"{message}\n{logging.Formatter().formatException(record.exc_info)}"
+            data = message.encode("utf-8")[:self.slot_size - self.slot.size]
+            created = max(record.created, self._created(self.written - 1)) if self.written else record.created
+            offset = self._offset(self.written)
+            self.slot.pack_into(self.map, offset, created, record.levelno, len(data))
+            self.map[offset + self.slot.size:offset + self.slot.size + len(data)] = data
+            self.written += 1
+            self.header.pack_into(self.map, 0, self.magic, self.capacity, self.slot_size, self.written)
+        except Exception:
+            self.handleError(record)
+
+    def get_logs(self, since=None, until=None, level=logging.NOTSET, limit=None):
+        """Return formatted records between since and until (epoch seconds) at or above level, newest last."""
+        entries = []
+        with self.lock:
+            indexes = range(max(0, self.written - self.capacity), self.written)
+            low = bisect.bisect_left(indexes, since, key=self._created) if since is not None else 0
+            high = bisect.bisect_right(indexes, until, key=self._created) if until is not None else len(indexes)
+            for index in reversed(indexes[low:high]):
+                offset = self._offset(index)
+                created, levelno, length = self.slot.unpack_from(self.map, offset)
+                if levelno < level:
+                    continue
+                entries.append((created, levelno, self.map[offset + self.slot.size:offset + self.slot.size + length]))
+                if limit and len(entries) >= limit:
+                    break
+
+        return [
+            self.format(logging.makeLogRecord({
+                "msg": data.decode("utf-8", errors="ignore"),
+                "levelno": levelno,
+                "levelname": logging.getLevelName(levelno),
+                "created": created,
+                "msecs": (created % 1) * 1000,
+            }))
+            for created, levelno, data in reversed(entries)
+        ]
+
+    def close(self):
+        with self.lock:
+            self.map.flush()
+            self.map.close()
+        super().close()
+
+
+class CircuitBreaker:
+    """Per-registry circuit breaker.
+
+    Opens after `threshold` consecutive failed lookups, then lets a single probe through
+    once the cooldown has passed. A failed probe doubles the cooldown, up to `max_cooldown`.
+    """
+
+    def __init__(self, host, threshold=3, cooldown=60, max_cooldown=3600):
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown = self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if not self.probing and time.time() - self.opened_at >= self.cooldown:
+                self.probing = True
+                logger.info(f"Probing registry {self.host}.")
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info(f"Registry {self.host} is reachable again.")
+            self.failures, self.opened_at, self.probing = 0, None, False
+            self.cooldown = self.base_cooldown
+
+    def next_probe_time(self) -> float:
+        """Return when the next request may be sent: now while closed, the end of the cooldown while open."""
+        with self.lock:
+            return time.time() if self.opened_at is None else self.opened_at + self.cooldown
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.opened_at is not None or self.failures < self.threshold:
+                return
+            self.opened_at, self.probing = time.time(), False
+            logger.warning(f"Registry {self.host} is unavailable, skipping lookups for {self.cooldown}s.")
+
+
+class ImageReference(NamedTuple):
+    """Normalized image reference: registry, repository path, tag and optional digest."""
+    registry: str
+    repository: str
+    tag: str
+    digest: str
+
+    @property
+    def path(self) -> str:
+        """Repository with tag, or with digest for digest-only references."""
+        return f"{self.repository}:{self.tag}" if self.tag else f"{self.repository}@{self.digest}"
+
+    @property
+    def repository_name(self) -> str:
+        """Registry and repository without tag, as passed to docker pull and docker tag."""
+        return self.repository if self.registry == "docker.io" else f"{self.registry}/{self.repository}"
+
+    @property
+    def name(self) -> str:
+        """Fully qualified reference, e.g. docker.io/library/nginx:latest."""
+        return f"{self.registry}/{self.path}"
+
+    @property
+    def short_name(self) -> str:
+        """Reference as pulled and reported, without the docker.io/ prefix."""
+        return self.path if self.registry == "docker.io" else self.name
+
+    @property
+    def display_name(self) -> str:
+        """Reference as shown on the dashboard, without docker.io/ and library/."""
+        if self.registry == "docker.io" and self.repository.startswith("library/"):
+            return self.path[len("library/"):]
+        return self.short_name
+
+
+class ImageRecord:
+    """Inventory entry for one image tag used by containers."""
+    __slots__ = ("container_name", "digest", "image", "size", "status", "created", "count", "display_image", "key", "service", "newer_tag", "remote_digest")
+
+    def __init__(self, container_name: List[str], digest: str, image: str, size: str, created: str, status: str = "uptodate", service: bool = False):
+        self.container_name = container_name
+        self.digest = digest
+        self.image = image
+        self.size = size
+        self.status = status
+        self.created = created
+        self.count = 0
+        self.display_image = sys.intern(image[len("local/"):] if image.startswith("local/") else parse_image_reference(image).display_name)
+        self.key = (tuple(container_name), digest, size, created)
+        self.service = service
+        self.newer_tag = ""
+        self.remote_digest = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "container_name": self.container_name,
+            "digest": self.digest,
+            "image": self.image,
+            "size": self.size,
+            "status": self.status,
+            "created": self.created,
+            "service": self.service,
+            "newer_tag": self.newer_tag,
+        }
+
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -59,13 +332,13 @@ logger.setLevel(logging.INFO)
 if logger.hasHandlers():
     logger.handlers.clear()
 
-limited_handler = LimitedMemoryHandler(capacity=1000)
-limited_handler.setLevel(logging.INFO)
+log_handler = LimitedMemoryHandler(capacity=1000)
+log_handler.setLevel(logging.INFO)
 
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-limited_handler.setFormatter(formatter)
+log_handler.setFormatter(formatter)
 
-logger.addHandler(limited_handler)
+logger.addHandler(log_handler)
 
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
@@ -75,10 +348,6 @@ logger.addHandler(console_handler)
 werkzeug_logger = logging.getLogger('werkzeug')
 werkzeug_logger.disabled = True
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-app.logger.disabled = True
-
 
 def get_platform_base_url() -> str:
     """Returns the Docker socket path based on the OS."""
@@ -98,7 +367,7 @@ def get_docker_engine_info() -> dict:
             "docker_engine_name": docker_client.info().get("Name", ""),
             "docker_version": docker_client.version().get("Version", "")
         }
-    except (DockerException, Exception) as e:
+    except Exception as e:
         logger.error(f"Error fetching Docker info: {e}.")
         return {"docker_engine_name": "N/A", "docker_version": "N/A"}
 
@@ -147,6 +416,34 @@ def get_compose_version() -> dict:
     return {"docker_compose_version": "N/A"}
 
 
+@lru_cache(maxsize=None)
+def get_compose_command() -> tuple:
+    """Return the first working Docker Compose command; cached once found."""
+    commands = [
+        (["docker", "compose", "version"], ("docker", "compose")),
+        (["docker-compose", "version"], ("docker-compose",))
+    ]
+    for check_cmd, return_cmd in commands:
+        try:
+            subprocess.run(check_cmd, capture_output=True, check=True)
+            return return_cmd
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            logger.warning(f"Command not usable: {' '.join(check_cmd)}")
+    logger.error("No working Docker Compose command found.")
+    raise RuntimeError("Docker Compose is not installed or functional.")
+
+
+@lru_cache(maxsize=None)
+def get_node_info() -> dict:
+    """Run the Docker engine, Compose and containerd probes concurrently; the result is cached."""
+    node_info = {}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        probes = [executor.submit(probe) for probe in (get_docker_engine_info, get_compose_version, get_containerd_version)]
+        for probe in probes:
+            node_info.update(probe.result())
+    return node_info
+
+
 def send_message(message: str):
     """Send HTTP POST requests with retry logic."""
     def send_request(url, json_data=None, data=None, headers=None):
@@ -164,21 +461,21 @@ def send_message(message: str):
                 response.raise_for_status()
                 return response
     
-            except HTTPError as e:
+            except requests.exceptions.HTTPError as e:
                 status = e.response.status_code if e.response else "?"
                 logger.error(f"[{attempt+1}/{max_attempts}] HTTP {status}")
     
-            except Timeout:
+            except requests.exceptions.Timeout:
                 logger.error(f"[{attempt+1}/{max_attempts}] Timeout")
     
-            except ConnectionError as e:
+            except requests.exceptions.ConnectionError as e:
                 msg = str(e).lower()
                 if "name resolution" in msg or "failed to resolve" in msg:
                     logger.error(f"[{attempt+1}/{max_attempts}] DNS resolution failed")
                 else:
                     logger.error(f"[{attempt+1}/{max_attempts}] Connection error")
     
-            except RequestException:
+            except requests.exceptions.RequestException:
                 logger.error(f"[{attempt+1}/{max_attempts}] Request error")
     
             if attempt == max_attempts - 1:
@@ -229,29 +526,106 @@ def send_message(message: str):
         send_request(url, payload_json, data, header_json)
 
 
-def deduplicate_data(data):
+def deduplicate_data(data: List[ImageRecord]) -> List[ImageRecord]:
     """Remove duplicates from data, preferring non-library images."""
     seen = {}
 
     for entry in data:
-        key = tuple(
-            (k, tuple(v) if isinstance(v, list) else v)
-            for k, v in sorted(entry.items()) if k != 'image'
-        )
+        stored = seen.get(entry.key)
+        if stored is None:
+            seen[entry.key] = entry
+        elif not entry.image.startswith('docker.io/library/') and stored.image.startswith('docker.io/library/'):
+            seen[entry.key] = entry
+
+    return list(seen.values())
+
+
+@lru_cache(maxsize=None)
+def parse_image_reference(reference: str) -> ImageReference:
+    """Parse an image reference once per process, applying Docker Hub defaults.
+
+    Handles registries with ports (localhost:5000/app:1.0), nested paths
+    (registry.gitlab.com/group/sub/app:tag) and digest-pinned references
+    (app@sha256:...). Raises ValueError for malformed references.
+    """
+    remainder, _, digest = reference.partition("@")
+    if not remainder or (digest and not digest.startswith("sha256:")):
+        raise ValueError(f"Invalid image reference: {reference}")
+
+    components = remainder.split("/")
+    if len(components) > 1 and ("." in components[0] or ":" in components[0] or components[0] == "localhost"):
+        registry, components = components[0], components[1:]
+    else:
+        registry = "docker.io"
+
+    repository = "/".join(components)
+    last, colon, tag = components[-1].rpartition(":")
+    if colon:
+        repository = "/".join(components[:-1] + [last])
+    else:
+        tag = "" if digest else "latest"
+
+    if not repository or "" in repository.split("/") or (colon and not tag):
+        raise ValueError(f"Invalid image reference: {reference}")
+
+    if registry in ("docker.io", "index.docker.io") and "/" not in repository:
+        registry, repository = "docker.io", f"library/{repository}"
+
+    return ImageReference(sys.intern(registry), sys.intern(repository), sys.intern(tag), sys.intern(digest))
+
 
-        if key in seen:
-            current_image = entry['image']
-            stored_image = seen[key]['image']
-            if not current_image.startswith('docker.io/library/') and stored_image.startswith('docker.io/library/'):
-                seen[key] = entry.copy()
+def normalize_image_tag(tag: str, is_local: bool) -> str:
+    """Return the fully qualified, interned inventory reference for an image tag."""
+    if is_local:
+        return sys.intern(f"local/{tag.split('/')[-1]}")
+    try:
+        reference = parse_image_reference(tag)
+    except ValueError:
+        return sys.intern(f"local/{tag}")
+    if reference.digest:
+        return sys.intern(f"local/{tag.split('@')[0]}:<none>")
+    return sys.intern(reference.name)
+
+
+def format_docker_time(created_raw: str) -> str:
+    """Format a Docker API timestamp (nanosecond precision, UTC) for display."""
+    if not created_raw:
+        return "Unknown"
+    try:
+        if '.' in created_raw:
+            base, frac = created_raw.split('.')
+            frac = frac.rstrip('Z')
+            frac = (frac + "000000")[:6]
+            created_raw_truncated = f"{base}.{frac}Z"
+            created_dt = datetime.strptime(created_raw_truncated, "%Y-%m-%dT%H:%M:%S.%fZ")
         else:
-            seen[key] = entry.copy()
+            created_dt = datetime.strptime(created_raw, "%Y-%m-%dT%H:%M:%SZ")
+        return created_dt.strftime("%Y-%m-%d %H:%M:%S")
+    except Exception as e:
+        logger.error(f"Error parsing Created timestamp: {e}.")
+        return "Unknown"
 
-    return list(seen.values())
 
+def get_swarm_service_records(docker_client) -> List[ImageRecord]:
+    """Return one inventory entry per Swarm service, using the digest pinned in its spec, whatever the replica count."""
+    records = []
+    try:
+        services = docker_client.services.list()
+    except docker.errors.APIError as e:
+        logger.error(f"Error listing Swarm services: {e}.")
+        return records
+
+    for service in services:
+        spec_image = service.attrs['Spec']['TaskTemplate']['ContainerSpec']['Image']
+        image, _, digest = spec_image.partition("@")
+        created = format_docker_time(service.attrs.get("UpdatedAt"))
+        records.append(ImageRecord([service.name], digest or "unknown", normalize_image_tag(image, False), "N/A", created, service=True))
 
-def get_non_dangling_images() -> List[Dict[str, str]]:
-    """Retrieves all non-dangling Docker images currently in use by containers."""
+    return records
+
+
+def get_non_dangling_images() -> List[ImageRecord]:
+    """Retrieves all non-dangling Docker images currently in use by containers, and Swarm services in Swarm mode."""
     global docker_image_data
 
     resource_data = []
@@ -260,11 +634,17 @@ def get_non_dangling_images() -> List[Dict[str, str]]:
         images = docker_client.images.list(filters={'dangling': False})
         containers = docker_client.containers.list(all=True)
 
-        used_image_ids = {container.image.id for container in containers}
-        
+        if swarm_mode:
+            containers = [c for c in containers if "com.docker.swarm.service.id" not in c.labels]
+            resource_data.extend(get_swarm_service_records(docker_client))
+
+        container_names_by_image = {}
+        for container in containers:
+            container_names_by_image.setdefault(container.image.id, []).append(container.name)
+
         for image in images:
 
-            if image.id not in used_image_ids:
+            if image.id not in container_names_by_image:
                 continue
 
             image_tags = image.tags if image.tags else [image.attrs.get("RepoDigests", ["<untagged>"])[0]]
@@ -279,160 +659,469 @@ def get_non_dangling_images() -> List[Dict[str, str]]:
                 raw_digest = repo_digests[0] if repo_digests else None
                 digest = raw_digest.split('@')[1] if raw_digest and '@' in raw_digest else "unknown"
 
-            size_mb = image.attrs.get("Size", 0) / (1024 * 1024)
+            size = f'{image.attrs.get("Size", 0) / (1024 * 1024):.2f} MB'
 
-            created_raw = image.attrs.get("Created", None)
-            created = "Unknown"
-            if created_raw:
-                try:
-                    if '.' in created_raw:
-                        base, frac = created_raw.split('.')
-                        frac = frac.rstrip('Z')
-                        frac = (frac + "000000")[:6]
-                        created_raw_truncated = f"{base}.{frac}Z"
-                        created_dt = datetime.strptime(created_raw_truncated, "%Y-%m-%dT%H:%M:%S.%fZ")
-                    else:
-                        created_dt = datetime.strptime(created_raw, "%Y-%m-%dT%H:%M:%SZ")
-                    created = created_dt.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception as e:
-                    logger.error(f"Error parsing Created timestamp: {e}.")
+            created = format_docker_time(image.attrs.get("Created", None))
 
+            container_names = container_names_by_image[image.id]
             for tag in image_tags:
-                parts = tag.split('/')
-                if is_local:
-                    image_name_tag = parts[-1]
-                    image_tag = f'local/{image_name_tag}'
-                else:
-                    if len(parts) == 1:
-                        image_tag = f'docker.io/library/{tag}'
-                    elif '.' not in parts[0] and ':' not in parts[0]:
-                        image_tag = f'docker.io/{tag}'
-                    else:
-                        image_tag = tag
-
-                container_names = [
-                    container.name for container in containers if container.image.id == image.id
-                ]
-                if "@sha256" in image_tag:
-                    image_tag = f"local/{image_tag.split('@')[0]}:<none>"
-                resource_data.append({
-                    "container_name": container_names,
-                    "digest": digest,
-                    "image": image_tag,
-                    "size": f"{size_mb:.2f} MB",
-                    "status": "uptodate",
-                    "created": created
-                })
-
-    except (DockerException, Exception) as e:
+                image_tag = normalize_image_tag(tag, is_local)
+                resource_data.append(ImageRecord(container_names, digest, image_tag, size, created))
+
+    except Exception as e:
         logger.error(f"Error retrieving Docker data: {e}.")
 
     resource_data = deduplicate_data(resource_data)
 
-    resource_data.sort(key=lambda x: x["container_name"][0] if x["container_name"] else "")
+    resource_data.sort(key=lambda x: x.container_name[0] if x.container_name else "")
     for idx, item in enumerate(resource_data, start=1):
-        item["count"] = idx
+        item.count = idx
     docker_image_data = resource_data
 
     return resource_data
 
 
-def get_registry_digest(registry: str, owner: str, image: str, tag: str) -> str:
-    """Retrieve the latest digest for a Docker image from a registry."""
+def get_registry_url(host: str) -> str:
+    """Return the base URL of a registry host, using plain HTTP for loopback registries like Docker does."""
+    hostname = host.split(":", 1)[0]
+    scheme = "http" if hostname in ("localhost", "127.0.0.1", "::1") else "https"
+    return f"{scheme}://{host}"
+
+
+def load_docker_credentials() -> dict:
+    """Read registry credentials from the Docker config.json, keyed by registry host."""
+    global docker_credentials
+
+    if docker_credentials is not None:
+        return docker_credentials
+
+    docker_credentials = {}
+    config_dir = os.environ.get("DOCKER_CONFIG", os.path.join(os.path.expanduser("~"), ".docker"))
+    docker_config = os.path.join(config_dir, "config.json")
+
+    if not os.path.exists(docker_config):
+        return docker_credentials
+
+    try:
+        with open(docker_config, "r") as file:
+            auths = json.load(file).get("auths", {})
+        for key, value in auths.items():
+            username, password = value.get("username"), value.get("password")
+            if value.get("auth"):
+                username, _, password = base64.b64decode(value["auth"]).decode("utf-8").partition(":")
+            if not username:
+                continue
+            host = urlparse(key if "://" in key else f"//{key}").netloc
+            if host in ("index.docker.io", "registry.hub.docker.com", "docker.io"):
+                host = "registry-1.docker.io"
+            docker_credentials[host] = (username, password)
+        logger.info(f"Loaded registry credentials for: {', '.join(sorted(docker_credentials)) or 'none'}.")
+    except (json.JSONDecodeError, ValueError, AttributeError, OSError) as e:
+        logger.error(f"Failed to read {docker_config}: {e}.")
+
+    return docker_credentials
+
+
+def parse_www_authenticate(header: str) -> dict:
+    """Parse a WWW-Authenticate header into its scheme and parameters, quoted or not."""
+    scheme, _, params = header.strip().partition(" ")
+    challenge = {key.lower(): quoted or bare for key, quoted, bare in re.findall(r'(\w+)=(?:"([^"]*)"|([^,\s]+))', params)}
+    challenge["scheme"] = scheme.lower()
+    return challenge
+
+
+def get_registry_challenge(host: str) -> dict:
+    """Discover the auth challenge of a registry once and cache it."""
+    if host in registry_challenges:
+        return registry_challenges[host]
+
+    challenge = {"scheme": None}
+    try:
+        response = requests.get(f"{get_registry_url(host)}/v2/", timeout=registry_timeout)
+        logger.debug(f"Auth discovery for {host}: HTTP {response.status_code}, {response.headers.get('WWW-Authenticate', 'no challenge')}.")
+        if response.status_code == 401 and "WWW-Authenticate" in response.headers:
+            challenge = parse_www_authenticate(response.headers["WWW-Authenticate"])
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Unable to discover auth for {host}: {e}.")
+        return challenge
+
+    registry_challenges[host] = challenge
+    return challenge
+
+
+def get_registry_auth_header(host: str, repository: str) -> Dict[str, str]:
+    """Return the Authorization header for pulling a repository, or None if authentication failed.
+
+    A throttled (429) or failing (5xx) token endpoint raises requests.exceptions.HTTPError instead,
+    so callers count it against the registry's circuit breaker rather than as a rejection.
+    """
+    challenge = get_registry_challenge(host)
+    credentials = load_docker_credentials().get(host)
+
+    if challenge["scheme"] == "basic":
+        if not credentials:
+            logger.error(f"No credentials for {host} in Docker config.json.")
+            return None
+        encoded = base64.b64encode(":".join(credentials).encode("utf-8")).decode("ascii")
+        return {"Authorization": f"Basic {encoded}"}
+
+    if challenge["scheme"] != "bearer":
+        return {}
+    if not challenge.get("realm"):
+        logger.error(f"Bearer challenge of {host} has no realm.")
+        return None
+
+    cached = registry_tokens.get((host, repository))
+    if cached and cached[1] > time.time():
+        return {"Authorization": f"Bearer {cached[0]}"}
+
+    params = {"scope": f"repository:{repository}:pull"}
+    if challenge.get("service"):
+        params["service"] = challenge["service"]
+
+    response = requests.get(challenge["realm"], params=params, auth=credentials, timeout=registry_timeout)
+    logger.debug(f"Token request for {repository} at {challenge['realm']}: HTTP {response.status_code}.")
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    if response.status_code != 200:
+        logger.error(f"Token request to {challenge['realm']} failed with HTTP {response.status_code}.")
+        return None
+
+    try:
+        token_data = response.json()
+        token = token_data.get("token") or token_data.get("access_token", "")
+        expires_in = int(token_data.get("expires_in", 60))
+    except (ValueError, AttributeError, TypeError) as e:
+        logger.error(f"Invalid token response from {challenge['realm']}: {e}.")
+        return None
+    registry_tokens[(host, repository)] = (token, time.time() + max(expires_in - 10, 0))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def get_registry_breaker(host: str) -> "CircuitBreaker":
+    """Return the circuit breaker of a registry host."""
+    return registry_breakers.setdefault(host, CircuitBreaker(host))
+
+
+def get_retry_delay(response, attempt: int) -> float:
+    """Return the delay before retrying a throttled or failed registry request."""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(int(retry_after), 30)
+    return (2 ** attempt) + random.uniform(0, 1)
+
+
+def get_registry_digest(reference: ImageReference) -> str:
+    """Retrieve the latest digest for a Docker image from a registry.
+
+    Returns an empty string on errors and None if the registry is skipped by its circuit breaker.
+    """
     digest = ""
-    max_retries, retry_delay = 3, 2
-
-    if registry in ["lscr.io", "ghcr.io"]:
-        auth_url = f"https://ghcr.io/token?scope=repository:{owner}/{image}:pull"
-        manifest_url = f"https://ghcr.io/v2/{owner}/{image}/manifests/{tag}"
-    elif registry in ["docker.io", "registry.hub.docker.com"]:
-        auth_url = "https://auth.docker.io/token"
-        auth_params = {"service": "registry.docker.io", "scope": f"repository:{owner}/{image}:pull"}
-        manifest_url = f"https://registry-1.docker.io/v2/{owner}/{image}/manifests/{tag}"
-    elif registry == "registry.gitlab.com":
-        auth_url = f"https://gitlab.com/jwt/auth?service=container_registry&scope=repository:{owner}/{image}:pull"
-        manifest_url = f"https://registry.gitlab.com/v2/{owner}/{image}/manifests/{tag}"
-    else:
-        auth_url = f"https://{registry}/v2/token"
-        manifest_url = f"https://{registry}/v2/{owner}/{image}/manifests/{tag}"
+    max_retries = 3
+
+    host = registry_hosts.get(reference.registry, reference.registry)
+    repository = reference.repository
+    manifest_url = f"{get_registry_url(host)}/v2/{repository}/manifests/{reference.tag or reference.digest}"
+
+    breaker = get_registry_breaker(host)
+    if not breaker.allow():
+        return None
 
     try:
-        response_token = requests.get(auth_url, params=auth_params if registry in ["docker.io", "registry.hub.docker.com"] else None)
-        if response_token.status_code == 200:
-            token = response_token.json().get("token", "")
-        else:
+        headers = get_registry_auth_header(host, repository)
+        if headers is None:
+            breaker.record_success()
             return digest
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": ", ".join([
-                "application/vnd.docker.distribution.manifest.v2+json",
-                "application/vnd.docker.distribution.manifest.list.v2+json",
-                "application/vnd.oci.image.manifest.v1+json",
-                "application/vnd.oci.image.index.v1+json",
-            ])
-        }
+        headers["Accept"] = ", ".join(manifest_media_types)
 
         for attempt in range(max_retries):
-            response = requests.get(manifest_url, headers=headers)
+            response = requests.get(manifest_url, headers=headers, timeout=registry_timeout)
+            logger.debug(f"GET {manifest_url}: HTTP {response.status_code} in {response.elapsed.total_seconds():.3f}s.")
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt < max_retries - 1:
+                    time.sleep(get_retry_delay(response, attempt))
+                continue
+
+            breaker.record_success()
             if response.status_code == 200:
                 digest = response.headers.get("Docker-Content-Digest", "")
                 if digest:
                     return digest
-                else:
-                    manifest_data = response.json()
-                    if "manifests" in manifest_data:
-                        for manifest in manifest_data["manifests"]:
-                            if manifest.get("mediaType") in [
-                                "application/vnd.docker.distribution.manifest.v2+json",
-                                "application/vnd.oci.image.manifest.v1+json"
-                            ]:
-                                return manifest["digest"]
+                manifest_data = response.json()
+                for manifest in manifest_data.get("manifests", []):
+                    if manifest.get("mediaType") in [
+                        "application/vnd.docker.distribution.manifest.v2+json",
+                        "application/vnd.oci.image.manifest.v1+json"
+                    ]:
+                        return manifest["digest"]
             elif response.status_code == 401:
                 logger.error(f"Authentication failed for {manifest_url}.")
-                return digest
+                registry_tokens.pop((host, repository), None)
+                if host not in known_registry_challenges:
+                    registry_challenges.pop(host, None)
             else:
-                time.sleep(retry_delay)
+                logger.warning(f"Registry returned HTTP {response.status_code} for {manifest_url}.")
+            return digest
+
+        logger.error(f"Registry {host} kept failing for {manifest_url}.")
+        breaker.record_failure()
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Request error: {e}.")
+        breaker.record_failure()
+    except Exception as e:
+        logger.error(f"Unexpected registry error for {manifest_url}: {e!r}.")
+        breaker.record_failure()
 
     return digest
 
 
+def get_registry_json(reference: ImageReference, path: str):
+    """Fetch a manifest or blob of the reference's repository and return the parsed JSON, or None."""
+    host = registry_hosts.get(reference.registry, reference.registry)
+    url = f"{get_registry_url(host)}/v2/{reference.repository}/{path}"
+
+    breaker = get_registry_breaker(host)
+    if not breaker.allow():
+        return None
+
+    try:
+        headers = get_registry_auth_header(host, reference.repository)
+        if headers is None:
+            breaker.record_success()
+            return None
+        headers["Accept"] = ", ".join(manifest_media_types)
+        response = requests.get(url, headers=headers, timeout=registry_timeout)
+        logger.debug(f"GET {url}: HTTP {response.status_code} in {response.elapsed.total_seconds():.3f}s.")
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if response.status_code == 200:
+            return response.json()
+        logger.warning(f"Registry returned HTTP {response.status_code} for {url}.")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {e}.")
+        breaker.record_failure()
+    except ValueError as e:
+        logger.error(f"Invalid registry response from {url}: {e}.")
+    except Exception as e:
+        logger.error(f"Unexpected registry error for {url}: {e!r}.")
+        breaker.record_failure()
+
+    return None
+
+
+def get_registry_tags(reference: ImageReference, max_pages: int = 50):
+    """Return all tags of a repository, following the registry's Link pagination; None on failure."""
+    host = registry_hosts.get(reference.registry, reference.registry)
+    url = f"{get_registry_url(host)}/v2/{reference.repository}/tags/list?n=1000"
+    tags = []
+
+    breaker = get_registry_breaker(host)
+    if not breaker.allow():
+        return None
+
+    try:
+        headers = get_registry_auth_header(host, reference.repository)
+        if headers is None:
+            breaker.record_success()
+            return None
+        for _ in range(max_pages):
+            response = requests.get(url, headers=headers, timeout=registry_timeout)
+            logger.debug(f"GET {url}: HTTP {response.status_code} in {response.elapsed.total_seconds():.3f}s.")
+            if response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure()
+                return None
+            breaker.record_success()
+            if response.status_code != 200:
+                logger.warning(f"Registry returned HTTP {response.status_code} for {url}.")
+                return None
+            tags.extend(response.json().get("tags") or [])
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                break
+            url = urljoin(url, next_url)
+        return tags
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {e}.")
+        breaker.record_failure()
+    except ValueError as e:
+        logger.error(f"Invalid registry response from {url}: {e}.")
+    except Exception as e:
+        logger.error(f"Unexpected registry error for {url}: {e!r}.")
+        breaker.record_failure()
+    return None
+
+
+def parse_version_tag(tag: str):
+    """Split a version tag like v1.2.3-alpine into (prefix, numbers, suffix); None for other tags."""
+    match = version_tag_pattern.match(tag or "")
+    if not match:
+        return None
+    prefix, numbers, suffix = match.groups()
+    return prefix, tuple(int(part) for part in numbers.split(".")), suffix or ""
+
+
+def build_tag_index(tags: List[str]) -> dict:
+    """Index version tags by (prefix, component count, suffix, major), keeping the newest of each."""
+    index = {}
+    for tag in tags:
+        parsed = parse_version_tag(tag)
+        if not parsed:
+            continue
+        prefix, numbers, suffix = parsed
+        key = (prefix, len(numbers), suffix, numbers[0])
+        if key not in index or numbers > index[key][0]:
+            index[key] = (numbers, tag)
+    return index
+
+
+def get_newer_tag(reference: ImageReference) -> str:
+    """Return the newest tag of the same major version and format as the reference's tag, or "" if there is none.
+
+    postgres:16.2 is compared with 16.x tags only, 1.2.3-alpine with 1.x.y-alpine tags only.
+    Tag lists are cached per repository for TAG_CACHE_TTL minutes.
+    """
+    parsed = parse_version_tag(reference.tag)
+    if not parsed:
+        return ""
+
+    key = (registry_hosts.get(reference.registry, reference.registry), reference.repository)
+    cached = registry_tag_cache.get(key)
+    if cached is None or time.time() - cached[0] > tag_cache_ttl * 60:
+        tags = get_registry_tags(reference)
+        if tags is not None:
+            cached = registry_tag_cache[key] = (time.time(), build_tag_index(tags))
+        elif cached is None:
+            return ""
+
+    prefix, numbers, suffix = parsed
+    newest = cached[1].get((prefix, len(numbers), suffix, numbers[0]))
+    return newest[1] if newest and newest[0] > numbers else ""
+
+
+def get_platform_architecture() -> str:
+    """Return the OCI architecture name of this host."""
+    machine = platform.machine().lower()
+    return {"x86_64": "amd64", "aarch64": "arm64", "armv7l": "arm", "i686": "386"}.get(machine, machine)
+
+
+def get_download_estimate(reference: ImageReference, local_layers: set) -> dict:
+    """Estimate the bytes to download for an image by comparing its registry layers with local layers."""
+    estimate = {"download_bytes": None, "layers": None, "missing_layers": None}
+
+    manifest = get_registry_json(reference, f"manifests/{reference.tag or reference.digest}")
+    if manifest and "manifests" in manifest:
+        architecture = get_platform_architecture()
+        platform_manifest = next((
+            entry for entry in manifest["manifests"]
+            if entry.get("platform", {}).get("os") == "linux" and entry.get("platform", {}).get("architecture") == architecture
+        ), None)
+        manifest = get_registry_json(reference, f"manifests/{platform_manifest['digest']}") if platform_manifest else None
+
+    if not manifest or "layers" not in manifest or "config" not in manifest:
+        return estimate
+
+    config = get_registry_json(reference, f"blobs/{manifest['config']['digest']}")
+    diff_ids = config.get("rootfs", {}).get("diff_ids", []) if config else []
+    if len(diff_ids) != len(manifest["layers"]):
+        return estimate
+
+    missing = [layer for layer, diff_id in zip(manifest["layers"], diff_ids) if diff_id not in local_layers]
+    estimate["download_bytes"] = sum(layer.get("size", 0) for layer in missing)
+    estimate["layers"] = len(diff_ids)
+    estimate["missing_layers"] = len(missing)
+    return estimate
+
+
+def plan_upgrade(outdated_images: List[dict]) -> dict:
+    """Return what an upgrade of the outdated images would pull and restart, without changing anything."""
+    images, projects, services = {}, {}, []
+    docker_client = docker.DockerClient(base_url=platform_base_url, version="auto")
+    local_layers = {
+        layer for image in docker_client.images.list()
+        for layer in image.attrs.get("RootFS", {}).get("Layers", [])
+    }
+
+    for entry in outdated_images:
+        image, container_name = entry["image"], entry["container_name"]
+        if entry.get("service"):
+            services.append({"service": container_name, "image": image})
+            continue
+        if image not in images:
+            images[image] = {"image": image, "containers": [], **get_download_estimate(parse_image_reference(image), local_layers)}
+        images[image]["containers"].append(container_name)
+
+        try:
+            labels = docker_client.containers.get(container_name).attrs['Config'].get('Labels') or {}
+        except docker.errors.NotFound:
+            continue
+        project = labels.get('com.docker.compose.project')
+        if project:
+            projects.setdefault(project, {
+                "project": project,
+                "working_dir": labels.get('com.docker.compose.project.working_dir'),
+                "services": [],
+            })["services"].append(labels.get('com.docker.compose.service', container_name))
+
+    container_count = sum(len(entry["containers"]) for entry in images.values())
+    return {
+        "images": list(images.values()),
+        "compose_projects": list(projects.values()),
+        "swarm_services": services,
+        "download_bytes": sum(entry["download_bytes"] or 0 for entry in images.values()),
+        "unknown_download_images": [entry["image"] for entry in images.values() if entry["download_bytes"] is None],
+        "containers": container_count,
+        "expected_downtime_seconds": container_count * restart_downtime,
+        "estimated_duration_seconds": (len(images) + container_count + (1 if images else 0)) * upgrade_post_wait + container_count * restart_downtime,
+    }
+
+
+def make_outdated_entry(data: ImageRecord, container_name: str, image: str, remote_digest: str) -> dict:
+    """Return the upgrade entry of one container or Swarm service, with the remote digest to install."""
+    entry = {"container_name": container_name, "image": image, "digest": remote_digest}
+    if data.service:
+        entry["service"] = True
+    return entry
+
+
+def is_checkable(data: ImageRecord) -> bool:
+    """Return True if the record has a registry image and a known local digest to compare."""
+    return not data.image.startswith("local/") and data.digest != "unknown"
+
+
 def get_outdated_digests() -> List[dict]:
     """Check for outdated Docker images and return list with container names and image info."""
     outdated_images = []
     seen = set()
 
     for data in get_non_dangling_images():
-        local_digest = data["digest"]
-        full_image = data["image"]
-        container_names = data["container_name"]
+        local_digest = data.digest
+        full_image = data.image
+        container_names = data.container_name
 
-        if full_image.startswith("local/") or local_digest == "unknown":
+        if not is_checkable(data):
             continue
 
         try:
-            source, rest = full_image.split("/", 1)
-            owner_image, tag = rest.rsplit(":", 1)
-            owner, image = owner_image.split("/", 1) if "/" in owner_image else ("library", owner_image)
+            reference = parse_image_reference(full_image)
         except ValueError:
             logger.warning(f"Unable to parse image: {full_image}.")
             continue
 
-        if source.startswith(("docker.io", "ghcr.io", "lscr.io", "registry.")):
-            remote_digest = get_registry_digest(source, owner, image, tag)
-            display_image = full_image.replace("docker.io/", "") if source.startswith("docker.io") else full_image
+        remote_digest = get_registry_digest(reference)
+        display_image = reference.short_name
 
-            if remote_digest and remote_digest != local_digest:
-                unique_containers = set(container_names)
-                for container in unique_containers:
-                    entry = {"container_name": container, "image": display_image}
-                    entry_tuple = (container, display_image)
-                    if entry_tuple not in seen:
-                        seen.add(entry_tuple)
-                        outdated_images.append(entry)
+        if remote_digest and remote_digest != local_digest:
+            unique_containers = set(container_names)
+            for container in unique_containers:
+                entry = make_outdated_entry(data, container, display_image, remote_digest)
+                entry_tuple = (container, display_image)
+                if entry_tuple not in seen:
+                    seen.add(entry_tuple)
+                    outdated_images.append(entry)
 
     if outdated_images:
         for image in outdated_images:
@@ -441,46 +1130,73 @@ def get_outdated_digests() -> List[dict]:
     return outdated_images
 
 
-def get_outdated_digests_list():
+def get_outdated_digests_list(due_only: bool = False):
     """Check for outdated Docker images and return list with container names and image info."""
-    global old_list, docker_image_data
+    global old_list, docker_image_data, last_inventory_check
 
+    last_inventory_check = time.time()
+    previous_data = {(data.image, data.digest): data for data in docker_image_data}
     docker_image_data = get_non_dangling_images()
     new_list = result = []
-    count_all = count_with_digest = 0
+    count_all = count_with_digest = count_skipped = count_unavailable = 0
+    now = time.time()
 
     for data in docker_image_data:
-        local_digest = data["digest"]
-        full_image = data["image"]
-        container_names = data["container_name"]
+        local_digest = data.digest
+        full_image = data.image
+        container_names = data.container_name
+
+        if not is_checkable(data):
+            data.status = "unable"
+            count_all += 1
+            continue
 
         try:
-            source, rest = full_image.split("/", 1)
-            owner_image, tag = rest.rsplit(":", 1)
-            owner, image = owner_image.split("/", 1) if "/" in owner_image else ("library", owner_image)
+            reference = parse_image_reference(full_image)
         except ValueError:
             logger.warning(f"Unable to parse image: {full_image}.")
-            data["status"] = "error"
+            data.status = "error"
             continue
 
-        if source.startswith(("docker.io", "ghcr.io", "lscr.io", "registry.")):
-            digest = get_registry_digest(source, owner, image, tag)
-            if digest:
-                count_with_digest += 1
+        previous = previous_data.get((full_image, local_digest))
+        if due_only and previous and not is_check_due(full_image, now):
+            data.status, data.newer_tag, data.remote_digest = previous.status, previous.newer_tag, previous.remote_digest
+            if data.status == "outdated":
+                new_list.append(f"{orange_dot} *{reference.path}* outdated!\n")
+            if data.newer_tag:
+                new_list.append(f"{yellow_dot} *{reference.path}* {data.newer_tag} available!\n")
+            count_skipped += 1
+            count_all += 1
+            continue
 
-            if digest:
-                if digest != local_digest:
-                    data["status"] = "outdated"
-                    new_list.append(f"{orange_dot} *{owner}/{image}:{tag}* outdated!\n")
-                else:
-                    data["status"] = "uptodate"
-            else:
-                data["status"] = "error"
+        digest = get_registry_digest(reference)
+        if digest is None:
+            data.status = "unavailable"
+            image_retry_at[full_image] = get_registry_breaker(registry_hosts.get(reference.registry, reference.registry)).next_probe_time()
+            count_unavailable += 1
+            count_all += 1
+            continue
 
-        elif source.startswith("local"):
-            data["status"] = "unable"
+        image_last_checked[full_image] = now
+        image_retry_at.pop(full_image, None)
+        data.remote_digest = digest
+        if digest:
+            count_with_digest += 1
+
+        if digest:
+            if digest != local_digest:
+                data.status = "outdated"
+                new_list.append(f"{orange_dot} *{reference.path}* outdated!\n")
+                if prefetch_enabled and not data.service:
+                    schedule_prefetch(reference, digest)
+            else:
+                data.status = "uptodate"
+            if tag_discovery:
+                data.newer_tag = get_newer_tag(reference)
+                if data.newer_tag:
+                    new_list.append(f"{yellow_dot} *{reference.path}* {data.newer_tag} available!\n")
         else:
-            data["status"] = "error"
+            data.status = "error"
 
         count_all += 1
 
@@ -493,17 +1209,176 @@ def get_outdated_digests_list():
     with open(file_db, "w") as file:
         file.writelines(new_list)
 
-    logger.info(f"{count_all} local digests tracked, {count_with_digest} completed.")
+    logger.info(f"{count_all} local digests tracked, {count_with_digest} completed, {count_skipped} not due, {count_unavailable} skipped (registry unavailable).")
 
     if result:
         if notify_enabled:
             send_message(f"{header_message}{''.join(result)}")
         for item in result:
-            logger.info(f"{str(item).replace(orange_dot, 'Image: ').replace('*', '').strip()}")
+            logger.info(f"{str(item).replace(orange_dot, 'Image: ').replace(yellow_dot, 'Image: ').replace('*', '').strip()}")
             
 
-def pull_and_restart_outdated_images():
-    """Pull updated images, restart containers, then remove unused images."""
+def schedule_prefetch(reference: ImageReference, digest: str):
+    """Queue a background pull of a new digest unless it is already queued or pulled."""
+    global prefetch_executor
+
+    with prefetch_lock:
+        if prefetch_state.get(digest) in ("queued", "ready"):
+            return
+        prefetch_state[digest] = "queued"
+        if prefetch_executor is None:
+            prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_concurrency, thread_name_prefix="prefetch")
+    prefetch_executor.submit(prefetch_image, reference, digest)
+
+
+def prefetch_image(reference: ImageReference, digest: str):
+    """Pull an image by digest, without moving its tag, so the upgrade window only has to restart containers."""
+    state = "failed"
+    try:
+        if max_pull_mb:
+            docker_client = docker.DockerClient(base_url=platform_base_url, version="auto")
+            local_layers = {
+                layer for image in docker_client.images.list()
+                for layer in image.attrs.get("RootFS", {}).get("Layers", [])
+            }
+            download_bytes = get_download_estimate(reference, local_layers)["download_bytes"] or 0
+            if download_bytes > max_pull_mb * 1024 * 1024:
+                logger.warning(f"Not prefetching {reference.short_name}: download exceeds MAX_PULL_MB ({max_pull_mb} MB).")
+                state = "skipped"
+                return
+
+        logger.info(f"Prefetching {reference.short_name} ({digest}).")
+        docker_client = docker.DockerClient(base_url=platform_base_url, version="auto")
+        docker_client.images.pull(f"{reference.repository_name}@{digest}")
+        state = "ready"
+        logger.info(f"Prefetched {reference.short_name}.")
+    except Exception as e:
+        logger.error(f"Failed to prefetch {reference.short_name}: {e}")
+    finally:
+        with prefetch_lock:
+            prefetch_state[digest] = state
+            if state == "ready":
+                prefetched_images[reference.short_name] = digest
+
+
+def pull_prefetched_image(docker_client, image: str, digest: str):
+    """Tag the prefetched image for a reference and return it, or None if none was prefetched for that digest."""
+    prefetched_digest = prefetched_images.get(image)
+    if not prefetched_digest:
+        return None
+    if prefetched_digest != digest:
+        logger.info(f"Prefetched image for {image} ({prefetched_digest}) is not the digest to install, pulling instead.")
+        with prefetch_lock:
+            prefetched_images.pop(image, None)
+        return None
+
+    reference = parse_image_reference(image)
+    try:
+        prefetched = docker_client.images.get(f"{reference.repository_name}@{digest}")
+        prefetched.tag(reference.repository_name, reference.tag)
+        logger.info(f"Using prefetched image: {image}")
+        return prefetched
+    except docker.errors.APIError as e:
+        logger.warning(f"Prefetched image for {image} is not usable, pulling instead: {e}")
+        return None
+    finally:
+        with prefetch_lock:
+            prefetched_images.pop(image, None)
+
+
+def update_swarm_services(docker_client, entries: List[dict]):
+    """Roll new digests out to Swarm services through the service update API and wait for the rollouts.
+
+    All updates are submitted before waiting, so services roll out together; within a service Swarm
+    replaces SWARM_PARALLELISM tasks at a time. Only a rollout started after the update request counts.
+    Returns the update and error message lines.
+    """
+    updated_images = updated_errors = ""
+    pending = {}
+
+    for entry in entries:
+        service_name, image = entry["container_name"], entry["image"]
+        try:
+            service = docker_client.services.get(service_name)
+            previous_start = (service.attrs.get('UpdateStatus') or {}).get('StartedAt')
+            spec = service.attrs['Spec']
+            task_template = spec['TaskTemplate']
+            task_template['ContainerSpec']['Image'] = f"{image}@{entry['digest']}"
+            update_config = {**(spec.get('UpdateConfig') or {}), "Parallelism": swarm_parallelism}
+            docker_client.api.update_service(
+                service.id, service.version, task_template=task_template, update_config=update_config, fetch_current_spec=True
+            )
+            logger.info(f"Updating service {service_name} to {image}@{entry['digest']}.")
+            pending[service_name] = (image, previous_start)
+        except docker.errors.NotFound:
+            logger.error(f"Service {service_name} not found.")
+            updated_errors += f"{red_dot} Service {service_name} not found.\n"
+        except docker.errors.APIError as e:
+            logger.error(f"Failed to update service {service_name}: {e}")
+            updated_errors += f"{red_dot} Failed to update service {service_name}: {e}\n"
+
+    deadline = time.time() + swarm_update_timeout
+    while pending and time.time() < deadline:
+        for service_name, (image, previous_start) in list(pending.items()):
+            try:
+                update_status = docker_client.services.get(service_name).attrs.get('UpdateStatus') or {}
+            except docker.errors.APIError:
+                continue
+            # Until Swarm starts the new rollout, UpdateStatus still describes the previous one.
+            state = update_status.get('State') if update_status.get('StartedAt') != previous_start else None
+            if state == "completed":
+                logger.info(f"Service {service_name} updated.")
+                updated_images += f"{green_dot} *{parse_image_reference(image).path}* updated!\n"
+            elif state in ("paused", "rollback_started", "rollback_paused", "rollback_completed"):
+                logger.error(f"Update of service {service_name} failed: {state}.")
+                updated_errors += f"{red_dot} Update of service {service_name} failed ({state}).\n"
+            else:
+                continue
+            del pending[service_name]
+        if pending:
+            time.sleep(5)
+
+    for service_name in pending:
+        logger.warning(f"Service {service_name} did not finish updating in time.")
+        updated_errors += f"{red_dot} Service {service_name} did not finish updating in time.\n"
+
+    return updated_images, updated_errors
+
+
+def load_upgrade_checkpoint() -> dict:
+    """Return the checkpoint left by an interrupted or partly failed upgrade, or an empty one."""
+    if os.path.exists(file_checkpoint):
+        try:
+            with open(file_checkpoint, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to read {file_checkpoint}: {e}.")
+    return {"images": {}}
+
+
+def save_upgrade_checkpoint(checkpoint: dict):
+    """Write the upgrade checkpoint atomically, or remove it once nothing is left to resume."""
+    if not checkpoint["images"]:
+        if os.path.exists(file_checkpoint):
+            os.remove(file_checkpoint)
+        return
+    temp_file = f"{file_checkpoint}.tmp"
+    # The saved container settings include their environment, which may hold secrets.
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w") as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, file_checkpoint)
+
+
+def pull_and_restart_outdated_images() -> bool:
+    """Pull updated images and restart their containers image by image, then remove unused images.
+
+    Progress is checkpointed after every pull and restart, so an interrupted upgrade resumes where it
+    stopped and a failing image does not hold back the others. Returns False if anything failed.
+    """
 
     def find_compose_file(working_dir):
         try:
@@ -521,21 +1396,7 @@ def pull_and_restart_outdated_images():
             logger.error(f"Error accessing {working_dir}: {e}")
             return None
 
-    def get_compose_command():
-        commands = [
-            (["docker", "compose", "version"], ["docker", "compose"]),
-            (["docker-compose", "version"], ["docker-compose"])
-        ]
-        for check_cmd, return_cmd in commands:
-            try:
-                subprocess.run(check_cmd, capture_output=True, check=True)
-                return return_cmd
-            except (FileNotFoundError, subprocess.CalledProcessError):
-                logger.warning(f"Command not usable: {' '.join(check_cmd)}")
-        logger.error("No working Docker Compose command found.")
-        raise RuntimeError("Docker Compose is not installed or functional.")
-
-    def wait_for_image_pull(docker_client, image_id, timeout=30, post_wait=20):
+    def wait_for_image_pull(docker_client, image_id, timeout=30, post_wait=upgrade_post_wait):
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
@@ -548,7 +1409,7 @@ def pull_and_restart_outdated_images():
         time.sleep(post_wait)
         return False
 
-    def wait_for_container(docker_client, container_id, timeout=30, post_wait=20):
+    def wait_for_container(docker_client, container_id, timeout=30, post_wait=upgrade_post_wait):
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
@@ -563,7 +1424,7 @@ def pull_and_restart_outdated_images():
         time.sleep(post_wait)
         return False
 
-    def wait_for_image_removal(docker_client, image_ids, timeout=30, post_wait=20):
+    def wait_for_image_removal(docker_client, image_ids, timeout=30, post_wait=upgrade_post_wait):
         start_time = time.time()
         while time.time() - start_time < timeout:
             current_ids = {img.id for img in docker_client.images.list()}
@@ -575,146 +1436,196 @@ def pull_and_restart_outdated_images():
         time.sleep(post_wait)
         return False
 
+    def restart_container(docker_client, container_name, image, checkpoint):
+        """Recreate one container on the pulled image; returns an error line, or "" on success.
+
+        The run arguments of standalone containers are checkpointed before removal, so a container
+        removed by an interrupted upgrade is recreated on resume.
+        """
+        run_args = checkpoint["images"][image].setdefault("run_args", {})
+        try:
+            container = docker_client.containers.get(container_name)
+        except docker.errors.NotFound:
+            container = None
+            if container_name not in run_args:
+                logger.error(f"Container {container_name} not found.")
+                return f"{red_dot} Container {container_name} not found.\n"
+
+        working_dir = container and container.attrs['Config']['Labels'].get('com.docker.compose.project.working_dir')
+
+        if working_dir:
+            compose_file_name = find_compose_file(working_dir)
+            if not compose_file_name:
+                return f"{red_dot} Compose file not found for {container_name}.\n"
+
+            service_name = container.attrs['Config']['Labels'].get('com.docker.compose.service', container_name)
+
+            logger.info(f"Restarting container {container_name} using docker compose in {working_dir}.")
+            try:
+                compose_cmd = list(get_compose_command())
+                base_args = ["-f", compose_file_name, "up", "-d"]
+
+                if image.startswith("library/"):
+                    container_args = []
+                else:
+                    container_args = [service_name]
+
+                full_cmd = compose_cmd + base_args + container_args
+                logger.info(f"Restart command: {' '.join(full_cmd)}.")
+                result = subprocess.run(full_cmd, cwd=working_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+                if result.returncode != 0:
+                    retry_cmd = compose_cmd + base_args
+                    logger.info(f"Retry restart command: {' '.join(retry_cmd)}.")
+                    result = subprocess.run(retry_cmd, cwd=working_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+                if result.returncode != 0:
+                    logger.error(f"Retry also failed for {container_name}, return code: {result.returncode}")
+                    return f"{red_dot} Retry failed to restart {container_name} (code: {result.returncode})\n"
+                wait_for_container(docker_client, container_name)
+                return ""
+
+            except (subprocess.CalledProcessError, RuntimeError) as e:
+                logger.error(f"Failed to restart {container_name} via compose: {e}")
+                return f"{red_dot} Failed to restart {container_name} via compose: {e}\n"
+
+        try:
+            if container:
+                config = container.attrs['Config']
+                host_config = container.attrs['HostConfig']
+                networking_config = container.attrs.get('NetworkSettings', {}).get('Networks', {})
+
+                network_name = next(iter(networking_config.keys()), None)
+
+                ports = None
+                if host_config.get('PortBindings'):
+                    try:
+                        ports = {
+                            p.split("/")[0]: int(b[0]['HostPort'])
+                            for p, b in host_config.get('PortBindings', {}).items()
+                            if b and 'HostPort' in b[0]
+                        }
+                    except (IndexError, KeyError, ValueError) as e:
+                        logger.warning(f"Invalid port bindings for {container_name}: {e}")
+
+                run_args[container_name] = {
+                    "image": image,
+                    "name": container_name,
+                    "detach": True,
+                    "environment": config.get('Env'),
+                    "ports": ports,
+                    "volumes": host_config.get('Binds'),
+                    "command": config.get('Cmd'),
+                    "entrypoint": config.get('Entrypoint'),
+                    "labels": config.get('Labels'),
+                    "restart_policy": host_config.get('RestartPolicy'),
+                    "network": network_name,
+                }
+                save_upgrade_checkpoint(checkpoint)
+
+                container.stop()
+                container.remove()
+            else:
+                logger.info(f"Recreating container {container_name} removed by an interrupted upgrade.")
+
+            docker_client.containers.run(**run_args[container_name])
+            del run_args[container_name]
+
+            logger.info(f"Restarted container {container_name} with preserved configuration.")
+            wait_for_container(docker_client, container_name)
+            return ""
+
+        except docker.errors.APIError as e:
+            logger.error(f"Failed to restart {container_name}: {e}")
+            return f"{red_dot} Failed to restart {container_name}: {e}\n"
+
+    def pull_image(docker_client, image, step):
+        """Return the pulled image, reusing the one recorded in the checkpoint; raises if the tag did not move."""
+        if step.get("image_id"):
+            try:
+                pulled_image = docker_client.images.get(step["image_id"])
+                logger.info(f"Resuming with already pulled image: {image}")
+                return pulled_image
+            except docker.errors.ImageNotFound:
+                pass
+
+        logger.info(f"Pulling updated image: {image}")
+        pulled_image = pull_prefetched_image(docker_client, image, step.get("digest")) or docker_client.images.pull(image)
+        logger.info(f"Pulled: {image}")
+        wait_for_image_pull(docker_client, pulled_image.id)
+
+        expected_name = parse_image_reference(image).name
+        tags = docker_client.images.get(pulled_image.id).tags
+        if not any(parse_image_reference(tag).name == expected_name for tag in tags):
+            raise docker.errors.ImageNotFound(f"{image} is not tagged after the pull")
+        return pulled_image
+
     try:
         docker_client = docker.DockerClient(base_url=platform_base_url, version="auto")
         used_images_before = {c.image.id for c in docker_client.containers.list(all=True)}
 
         updated_images = ""
         updated_errors = ""
-        pulled_image_ids = set()
-        expected_images = {entry["image"] for entry in list_of_outdated_images}
+        checkpoint = load_upgrade_checkpoint()
 
-        if not list_of_outdated_images:
+        if not list_of_outdated_images and not checkpoint["images"]:
             logger.info("No outdated images to process.")
-            return
+            return True
+        if checkpoint["images"]:
+            logger.info(f"Resuming upgrade checkpoint with {len(checkpoint['images'])} images.")
+
+        service_entries = [entry for entry in list_of_outdated_images if entry.get("service")]
+        if service_entries:
+            updated_images, updated_errors = update_swarm_services(docker_client, service_entries)
 
         for entry in list_of_outdated_images:
-            image = entry["image"]
-            logger.info(f"Pulling updated image: {image}")
-            try:
-                pulled_image = docker_client.images.pull(image)
-                pulled_image_ids.add(pulled_image.id)
-                logger.info(f"Pulled: {image}")
-                wait_for_image_pull(docker_client, pulled_image.id)
-            except docker.errors.APIError as e:
-                logger.error(f"Failed to pull {image}: {e}")
-                updated_errors += f"{red_dot} Failed to pull {image}: {e}\n"
+            if entry.get("service"):
                 continue
-
-        pulled_image_names = set()
-        for image_id in pulled_image_ids:
-            try:
-                image = docker_client.images.get(image_id)
-                for tag in image.tags:
-                    if tag in expected_images:
-                        pulled_image_names.add(tag)
-            except docker.errors.ImageNotFound:
+            step = checkpoint["images"].setdefault(entry["image"], {"image_id": None, "digest": None, "attempts": 0, "containers": {}})
+            if entry.get("digest") and entry["digest"] != step.get("digest"):
+                step["digest"], step["image_id"] = entry["digest"], None
+            step["containers"].setdefault(entry["container_name"], "pending")
+        save_upgrade_checkpoint(checkpoint)
+
+        for image in sorted(checkpoint["images"]):
+            step = checkpoint["images"][image]
+            containers = sorted(name for name, state in step["containers"].items() if state != "done")
+            if not containers:
                 continue
-
-        missing_images = expected_images - pulled_image_names
-        if missing_images:
-            logger.error(f"Failed to pull all required images: {', '.join(missing_images)}")
-            updated_errors += f"{red_dot} Missing required images: {', '.join(missing_images)}\n"
-            if notify_enabled and updated_errors:
-                send_message(f"{header_message}{updated_errors}")
-            return
-
-        for entry in list_of_outdated_images:
-            image = entry["image"]
-            container_name = entry["container_name"]
-            parts = image.split('/')
-            image_name = f"{parts[1]}/{parts[2]}" if len(parts) == 3 else image
+            image_name = parse_image_reference(image).path
 
             try:
-                container = docker_client.containers.get(container_name)
-            except docker.errors.NotFound:
-                logger.error(f"Container {container_name} not found.")
-                updated_errors += f"{red_dot} Container {container_name} not found.\n"
+                step["image_id"] = pull_image(docker_client, image, step).id
+            except docker.errors.APIError as e:
+                logger.error(f"Failed to pull {image}: {e}")
+                updated_errors += f"{red_dot} Failed to pull {image}: {e}\n"
+                step["containers"].update(dict.fromkeys(containers, "failed"))
+                save_upgrade_checkpoint(checkpoint)
                 continue
+            save_upgrade_checkpoint(checkpoint)
 
-            working_dir = container.attrs['Config']['Labels'].get('com.docker.compose.project.working_dir')
-
-            if working_dir:
-                compose_file_name = find_compose_file(working_dir)
-                if not compose_file_name:
-                    updated_errors += f"{red_dot} Compose file not found for {container_name}.\n"
-                    continue
-
-                service_name = container.attrs['Config']['Labels'].get('com.docker.compose.service', container_name)
-
-                logger.info(f"Restarting container {container_name} using docker compose in {working_dir}.")
-                try:
-                    compose_cmd = get_compose_command()
-                    base_args = ["-f", compose_file_name, "up", "-d"]
-
-                    if image.startswith("library/"):
-                        container_args = []
-                    else:
-                        container_args = [service_name]
-
-                    full_cmd = compose_cmd + base_args + container_args
-                    logger.info(f"Restart command: {' '.join(full_cmd)}.")
-                    result = subprocess.run(full_cmd, cwd=working_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-                    if result.returncode != 0:
-                        retry_cmd = compose_cmd + base_args
-                        logger.info(f"Retry restart command: {' '.join(retry_cmd)}.")
-                        result = subprocess.run(retry_cmd, cwd=working_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-                    if result.returncode == 0:
-                        updated_images += f"{green_dot} *{image_name}* updated!\n"
-                        wait_for_container(docker_client, container_name)
-                    else:
-                        logger.error(f"Retry also failed for {container_name}, return code: {result.returncode}")
-                        updated_errors += f"{red_dot} Retry failed to restart {container_name} (code: {result.returncode})\n"
-
-                except subprocess.CalledProcessError as e:
-                    logger.error(f"Failed to restart {container_name} via compose: {e}")
-                    updated_errors += f"{red_dot} Failed to restart {container_name} via compose: {e}\n"
-
-            else:
+            for container_name in containers:
                 try:
-                    config = container.attrs['Config']
-                    host_config = container.attrs['HostConfig']
-                    networking_config = container.attrs.get('NetworkSettings', {}).get('Networks', {})
-
-                    container.stop()
-                    container.remove()
-
-                    network_name = next(iter(networking_config.keys()), None)
-
-                    ports = None
-                    if host_config.get('PortBindings'):
-                        try:
-                            ports = {
-                                p.split("/")[0]: int(b[0]['HostPort'])
-                                for p, b in host_config.get('PortBindings', {}).items()
-                                if b and 'HostPort' in b[0]
-                            }
-                        except (IndexError, KeyError, ValueError) as e:
-                            logger.warning(f"Invalid port bindings for {container_name}: {e}")
-
-                    new_container = docker_client.containers.run(
-                        image=image,
-                        name=container_name,
-                        detach=True,
-                        environment=config.get('Env'),
-                        ports=ports,
-                        volumes=host_config.get('Binds'),
-                        command=config.get('Cmd'),
-                        entrypoint=config.get('Entrypoint'),
-                        labels=config.get('Labels'),
-                        restart_policy=host_config.get('RestartPolicy'),
-                        network=network_name
-                    )
-
-                    logger.info(f"Restarted container {container_name} with preserved configuration.")
+                    error = restart_container(docker_client, container_name, image, checkpoint)
+                except docker.errors.DockerException as e:
+                    logger.error(f"Failed to restart {container_name}: {e}")
+                    error = f"{red_dot} Failed to restart {container_name}: {e}\n"
+                step["containers"][container_name] = "failed" if error else "done"
+                save_upgrade_checkpoint(checkpoint)
+                if error:
+                    updated_errors += error
+                else:
                     updated_images += f"{green_dot} *{image_name}* updated!\n"
-                    wait_for_container(docker_client, container_name)
 
-                except docker.errors.APIError as e:
-                    logger.error(f"Failed to restart {container_name}: {e}")
-                    updated_errors += f"{red_dot} Failed to restart {container_name}: {e}\n"
+        for image, step in list(checkpoint["images"].items()):
+            step["containers"] = {name: state for name, state in step["containers"].items() if state != "done"}
+            step["attempts"] += 1
+            if step["containers"] and step["attempts"] >= max_upgrade_attempts:
+                logger.warning(f"Giving up on {image} after {step['attempts']} attempts: {', '.join(step['containers'])}.")
+                step["containers"] = {}
+            if not step["containers"]:
+                del checkpoint["images"][image]
+        save_upgrade_checkpoint(checkpoint)
 
         used_images_after = {c.image.id for c in docker_client.containers.list(all=True)}
         unused_images = used_images_before - used_images_after
@@ -732,8 +1643,28 @@ def pull_and_restart_outdated_images():
         if notify_enabled and (updated_images or updated_errors):
             send_message(f"{header_message}{updated_images}{updated_errors}")
 
-    except DockerException as e:
+        return not updated_errors
+
+    except docker.errors.DockerException as e:
         logger.error(f"Error in updating and restarting containers: {e}")
+        return False
+
+
+def apply_pull_limit(outdated_images: List[dict]) -> List[dict]:
+    """Drop images whose estimated download exceeds MAX_PULL_MB; keeps everything if sizes cannot be estimated."""
+    if not outdated_images or not max_pull_mb:
+        return outdated_images
+
+    try:
+        plan = plan_upgrade(outdated_images)
+    except docker.errors.DockerException as e:
+        logger.warning(f"Unable to estimate download sizes, MAX_PULL_MB not applied: {e}.")
+        return outdated_images
+
+    too_large = {entry["image"] for entry in plan["images"] if (entry["download_bytes"] or 0) > max_pull_mb * 1024 * 1024}
+    for image in too_large:
+        logger.warning(f"Skipping {image}: download exceeds MAX_PULL_MB ({max_pull_mb} MB).")
+    return [entry for entry in outdated_images if entry["image"] not in too_large]
 
 
 def maintain_container_images():
@@ -743,8 +1674,9 @@ def maintain_container_images():
     global list_of_outdated_images, next_run_time
     time_start = datetime.now()
 
-    list_of_outdated_images = get_outdated_digests()
-    if list_of_outdated_images:
+    list_of_outdated_images = apply_pull_limit(get_outdated_digests())
+
+    if list_of_outdated_images or load_upgrade_checkpoint()["images"]:
         pull_and_restart_outdated_images()
 
     get_outdated_digests_list()
@@ -759,20 +1691,24 @@ def maintain_container_images():
 
 
 def checkonly_container_images():
-    """Checks for outdated container images without performing updates or restarts."""
+    """Checks images whose staggered check slot has come up, without performing updates or restarts."""
     global next_run_time_check
-    logger.info("Checking for outdated container images (no actions will be taken)...")
 
-    start_times_outdate_check = get_starts_check_times(start_times, upgrade_mode)
+    tracked_images = [data.image for data in docker_image_data if is_checkable(data)]
+    inventory_stale = time.time() - last_inventory_check >= check_intervals["rolling"] * 60
+    if not inventory_stale and not any(is_check_due(image) for image in tracked_images):
+        return
+
+    logger.info("Checking for outdated container images (no actions will be taken)...")
     time_start = datetime.now()
 
-    get_outdated_digests_list()
+    get_outdated_digests_list(due_only=True)
 
     time_end = datetime.now()
     elapsed = time_end - time_start
     minutes, seconds = divmod(elapsed.total_seconds(), 60)
     
-    next_run_time_check = get_next_start_time(start_times_outdate_check)
+    next_run_time_check = get_next_check_time()
     logger.info(f"Outdated image check completed in {int(minutes):02d}:{int(seconds):02d}.")
     logger.info(f"Next scheduled outdated image check: {next_run_time_check}.")
 
@@ -798,16 +1734,11 @@ def get_next_start_time(start_times):
     return datetime.combine(tomorrow, time_objects[0]).strftime("%Y-%m-%d %H:%M")
 
 
-def get_starts_check_times(start_times, upgrade_mode):
-    """Generate hourly times, skipping the nearest hour for each time in start_times."""
-    if not upgrade_mode:
-        start_times = []
-        
+def validate_start_times(start_times):
+    """Raise if start_times is not a list of 'HH:MM' strings."""
     if not isinstance(start_times, list):
         raise TypeError("start_times must be a list")
 
-    skip_hours = set()
-
     for time_str in start_times:
         if not isinstance(time_str, str):
             raise TypeError(f"Invalid time format '{time_str}'. Expected string in 'HH:MM' format")
@@ -818,15 +1749,60 @@ def get_starts_check_times(start_times, upgrade_mode):
         except ValueError:
             raise ValueError(f"Invalid time format '{time_str}'. Expected 'HH:MM'")
 
-        if minutes <= 29:
-            skip_hours.add(hours)
-        elif minutes >= 31:
-            skip_hours.add((hours + 1) % 24)
 
-    return [f"{hour:02d}:00" for hour in range(24) if hour not in skip_hours]
+def get_check_interval(image: str) -> int:
+    """Return the check interval in seconds: rolling tags often, version-pinned tags rarely."""
+    try:
+        reference = parse_image_reference(image)
+    except ValueError:
+        return check_intervals["rolling"] * 60
+    tag = reference.tag
+    if not tag or re.match(r"^v?\d+\.\d+\.\d+", tag):
+        kind = "pinned"
+    elif re.match(r"^v?\d+(\.\d+)?([-_.].*)?$", tag):
+        kind = "major"
+    else:
+        kind = "rolling"
+    return check_intervals[kind] * 60
+
+
+def get_check_offset(image: str, interval: int) -> int:
+    """Return a deterministic per-node, per-image offset within the check interval."""
+    seed = f"{socket.gethostname()}/{image}".encode("utf-8")
+    return int(hashlib.sha1(seed).hexdigest(), 16) % interval
+
+
+def get_last_check_slot(image: str, now: float) -> float:
+    """Return the start of the most recent check slot of an image."""
+    interval = get_check_interval(image)
+    offset = get_check_offset(image, interval)
+    return now - ((now - offset) % interval)
+
+
+def is_check_due(image: str, now: float = None) -> bool:
+    """Return True if the image has not been checked since its most recent check slot.
+
+    Images skipped because their registry is unavailable are not due before the registry's next probe.
+    """
+    now = time.time() if now is None else now
+    if now < image_retry_at.get(image, 0):
+        return False
+    last_checked = image_last_checked.get(image)
+    return last_checked is None or last_checked < get_last_check_slot(image, now)
+
+
+def get_next_check_time() -> str:
+    """Returns the earliest upcoming check slot across tracked images."""
+    now = time.time()
+    slots = [
+        image_retry_at.get(data.image) or get_last_check_slot(data.image, now) + get_check_interval(data.image)
+        for data in docker_image_data if is_checkable(data)
+    ]
+    if not slots:
+        return "N/A"
+    return datetime.fromtimestamp(min(slots)).strftime("%Y-%m-%d %H:%M")
 
 
-@app.after_request
 def add_security_headers(response):
     response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, proxy-revalidate, max-age=0"
     response.headers["Pragma"] = "no-cache"
@@ -835,39 +1811,53 @@ def add_security_headers(response):
     return response
 
 
-@app.route("/logs")
+def parse_log_time(value):
+    """Parse a /logs time filter given as epoch seconds or ISO date and time."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
 def stream_logs():
-    """Stream the last log records in HTML format."""
+    """Stream log records in HTML format, optionally filtered by since/until, level and limit."""
+    from flask import Response, request
+
+    try:
+        since = parse_log_time(request.args.get("since"))
+        until = parse_log_time(request.args.get("until"))
+        level = logging.getLevelName(request.args.get("level", "INFO").upper())
+        limit = int(request.args.get("limit", 1000))
+        if not isinstance(level, int):
+            raise ValueError(f"unknown level '{request.args.get('level')}'")
+    except ValueError as e:
+        return Response(f"Invalid log filter: {e}", status=400, mimetype="text/plain")
+
     def generate():
-        for line in limited_handler.get_logs():
+        for line in log_handler.get_logs(since=since, until=until, level=level, limit=limit):
             yield f"{line}<br/>"
     return Response(generate(), mimetype="text/html; charset=utf-8")
 
 
-@app.route('/')
 def display_docker_data():
     """Display Docker image data with last checked and scheduled next run times."""
-    display_data = []
-
-    for data in docker_image_data:
-        temp = data.copy()
-        if isinstance(temp["container_name"], list):
-            temp["container_name"] = ", ".join(temp["container_name"])
-        temp["image"] = temp["image"].replace("docker.io/", "").replace("local/", "").replace("library/", "")
-        display_data.append(temp)
+    from flask import render_template
 
     return render_template(
         'index.html',
         next_run_time = next_run_time,
         next_run_time_check = next_run_time_check,
         header_string = h1_string,
-        data=display_data,
+        data=docker_image_data,
     )
 
 
-@app.route('/health', methods=['GET'])
 def health_check():
     """Сheck if watchdigest container are running."""
+    from flask import jsonify
+
     try:
         result = subprocess.run(["docker", "ps", "--filter", "name=watchdigest", "--quiet"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
@@ -885,131 +1875,367 @@ def health_check():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+def upgrade_plan():
+    """Return the upgrade plan for the images currently marked outdated."""
+    from flask import jsonify
+
+    outdated_images = [
+        make_outdated_entry(data, container_name, parse_image_reference(data.image).short_name, data.remote_digest)
+        for data in docker_image_data if data.status == "outdated"
+        for container_name in data.container_name
+    ]
+    return jsonify(plan_upgrade(outdated_images))
+
+
+def create_app():
+    """Create the Flask app; Flask is only imported when the web interface is started."""
+    from flask import Flask
+    from flask_cors import CORS
+
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for all routes
+    app.logger.disabled = True
+    app.after_request(add_security_headers)
+    app.add_url_rule("/logs", view_func=stream_logs)
+    app.add_url_rule("/", view_func=display_docker_data)
+    app.add_url_rule("/health", view_func=health_check, methods=["GET"])
+    app.add_url_rule("/api/plan", view_func=upgrade_plan, methods=["GET"])
+    return app
+
+
 def run_flask():
     """Run Flask app in a separate thread."""
-    app.run(host='0.0.0.0', port=5151, debug=False, use_reloader=False)
+    create_app().run(host='0.0.0.0', port=5151, debug=False, use_reloader=False)
+
+
+def parse_config(config_json: dict) -> dict:
+    """Validate the content of config.json and return the settings it defines; raises on invalid values."""
+    settings = {
+        "startup_message": config_json.get("STARTUP_MESSAGE", True),
+        "notify_enabled": config_json.get("NOTIFY_ENABLED", False),
+        "default_dot_style": config_json.get("DEFAULT_DOT_STYLE", True),
+        "upgrade_mode": config_json.get("UPGRADE_MODE", True),
+        "start_times": config_json.get("START_TIMES", default_start_times),
+        "compose_files": config_json.get("COMPOSE_FILES", default_compose_files),
+        "max_pull_mb": int(config_json.get("MAX_PULL_MB", 0)),
+        "prefetch_enabled": config_json.get("PREFETCH", False),
+        "prefetch_concurrency": max(int(config_json.get("PREFETCH_CONCURRENCY", 1)), 1),
+        "swarm_mode": config_json.get("SWARM_MODE", False),
+        "swarm_parallelism": max(int(config_json.get("SWARM_PARALLELISM", 1)), 0),
+        "tag_discovery": config_json.get("TAG_DISCOVERY", False),
+        "tag_cache_ttl": max(int(config_json.get("TAG_CACHE_TTL", 360)), 1),
+        "check_intervals": dict(default_check_intervals),
+        "log_level": logging.getLevelName(str(config_json.get("LOG_LEVEL", "INFO")).upper()),
+        "platforms": {key: [] for key in notification_keys},
+        "monitoring_message": "",
+    }
+
+    validate_start_times(settings["start_times"])
+    if not isinstance(settings["log_level"], int):
+        raise ValueError(f"Invalid LOG_LEVEL '{config_json.get('LOG_LEVEL')}'")
+    if not isinstance(settings["compose_files"], list):
+        raise TypeError("COMPOSE_FILES must be a list")
+    for key, value in config_json.get("CHECK_INTERVALS", {}).items():
+        if key.lower() in settings["check_intervals"] and int(value) > 0:
+            settings["check_intervals"][key.lower()] = int(value)
+    if not settings["notify_enabled"]:
+        settings["startup_message"] = False
+
+    no_messaging_keys = ["STARTUP_MESSAGE", "NOTIFY_ENABLED", "DEFAULT_DOT_STYLE", "UPGRADE_MODE", "START_TIMES", "COMPOSE_FILES", "CHECK_INTERVALS", "MAX_PULL_MB", "PREFETCH", "PREFETCH_CONCURRENCY", "SWARM_MODE", "SWARM_PARALLELISM", "TAG_DISCOVERY", "TAG_CACHE_TTL", "LOG_LEVEL"]
+    if settings["notify_enabled"]:
+        monitoring_message = ""
+        messaging_platforms = list(set(config_json) - set(no_messaging_keys))
+        for platform in messaging_platforms:
+            if config_json[platform].get("ENABLED", False):
+                for key, value in config_json[platform].items():
+                    settings["platforms"].setdefault(f"platform_{key.lower()}", []).extend(value if isinstance(value, list) else [value])
+                monitoring_message += f"- messaging: {platform.lower().capitalize()},\n"
+        monitoring_message = "\n".join([*sorted(monitoring_message.splitlines()), ""])
+        monitoring_message += (
+            f"- startup message: {'On' if settings['startup_message'] else 'Off'},\n"
+            f"- dot style: {'Round' if settings['default_dot_style'] else 'Square'}.\n"
+        )
+        settings["monitoring_message"] = monitoring_message
 
+        if not all(settings["platforms"][key] for key in notification_keys):
+            settings["startup_message"] = False
 
-if __name__ == "__main__":
-    """Initialize and start monitoring."""
-    logger.info(f"Starting container image monitor...")
+    return settings
+
+
+def apply_config(settings: dict):
+    """Switch the module settings and notification targets to a parsed configuration."""
+    global startup_message, notify_enabled, default_dot_style, upgrade_mode, start_times, compose_files, max_pull_mb
+    global prefetch_enabled, prefetch_concurrency, prefetch_executor, swarm_mode, swarm_parallelism
+    global tag_discovery, tag_cache_ttl
+    global orange_dot, green_dot, red_dot, yellow_dot, white_dot
+
+    for key in [key for key in globals() if key.startswith("platform_") and key != "platform_base_url"]:
+        del globals()[key]
+    globals().update(settings["platforms"])
+
+    startup_message = settings["startup_message"]
+    notify_enabled = settings["notify_enabled"]
+    default_dot_style = settings["default_dot_style"]
+    upgrade_mode = settings["upgrade_mode"]
+    start_times = settings["start_times"]
+    compose_files = settings["compose_files"]
+    max_pull_mb = settings["max_pull_mb"]
+    prefetch_enabled = settings["prefetch_enabled"]
+    swarm_mode = settings["swarm_mode"]
+    swarm_parallelism = settings["swarm_parallelism"]
+    tag_discovery = settings["tag_discovery"]
+    tag_cache_ttl = settings["tag_cache_ttl"]
+    check_intervals.clear()
+    check_intervals.update(settings["check_intervals"])
+    logger.setLevel(settings["log_level"])
+    log_handler.setLevel(settings["log_level"])
+
+    with prefetch_lock:
+        if prefetch_executor and prefetch_concurrency != settings["prefetch_concurrency"]:
+            prefetch_executor.shutdown(wait=False)
+            prefetch_executor = None
+        prefetch_concurrency = settings["prefetch_concurrency"]
+
+    orange_dot, green_dot, red_dot, yellow_dot, white_dot = (dots if default_dot_style else square_dots).values()
+
+
+def read_config() -> dict:
+    """Read and validate config.json, remembering its modification time."""
+    global config_mtime
+
+    config_mtime = os.path.getmtime(config_file)
+    with open(config_file, "r") as file:
+        return parse_config(json.load(file))
+
+
+def load_config() -> str:
+    """Apply config.json to the module settings and return the messaging part of the startup message."""
+    settings = parse_config({})
+
+    if os.path.exists(config_file):
+        try:
+            settings = read_config()
+        except (json.JSONDecodeError, ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.error(f"Failed to read or parse config.json: {e}. Falling back to default settings.")
+    else:
+        logger.error(f"Configuration file 'config.json' not found. Falling back to default settings.")
+
+    apply_config(settings)
+    return settings["monitoring_message"]
+
+
+def reload_config():
+    """Apply config.json again when it has changed, keeping caches, inventory and logs."""
+    try:
+        if os.path.getmtime(config_file) == config_mtime:
+            return
+        settings = read_config()
+    except OSError:
+        return
+    except (json.JSONDecodeError, ValueError, TypeError, KeyError, AttributeError) as e:
+        logger.error(f"Ignoring changed config.json: {e}. Keeping the current settings.")
+        return
+
+    apply_config(settings)
+    schedule_upgrades()
+    logger.info(f"Reloaded config.json. Auto-upgrade mode: {'On' if upgrade_mode else 'Off'}, notifications: {'On' if notify_enabled else 'Off'}.")
+
+
+def schedule_upgrades():
+    """Replace the scheduled upgrade jobs with the current START_TIMES."""
+    global next_run_time
+
+    schedule.clear("upgrade")
+    if upgrade_mode:
+        for stime in start_times:
+            schedule.every().day.at(stime).do(maintain_container_images).tag("upgrade")
+        logger.info(f"Using check times for image upgrade: {', '.join(start_times)}.")
+    next_run_time = get_next_start_time(start_times)
+
+
+def open_log_ring(path: str):
+    """Switch logging from the in-memory buffer to the persistent ring file, if it can be opened."""
+    global log_handler
+
+    try:
+        ring_handler = RingLogHandler(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unable to open log file {path}: {e}. Keeping logs in memory.")
+        return
+
+    ring_handler.setLevel(log_handler.level)
+    ring_handler.setFormatter(formatter)
+    logger.addHandler(ring_handler)
+    logger.removeHandler(log_handler)
+    log_handler = ring_handler
+
+
+def load_state():
+    """Restore the list of already reported outdated images from the data file."""
+    global old_list
+
+    if os.path.exists(file_db):
+        try:
+            with open(file_db, "r") as file:
+                old_list = file.readlines()
+        except Exception as e:
+            logger.warning(f"Unable to read {file_db}: {e}.")
+
+
+def run_service():
+    """Start the web interface and the scheduled checks and upgrades."""
+    global header_message, h1_string
+
+    flask_thread = threading.Thread(target=run_flask, daemon=True)
+    flask_thread.start()
+
+    node_info = get_node_info()
+    node_name = node_info.get('docker_engine_name', 'N/A')
+    docker_version = node_info.get('docker_version', 'N/A')
+    docker_compose = node_info.get('docker_compose_version', 'N/A')
+    docker_containerd = node_info.get('containerd_version', 'N/A')
+    h1_string = f"{node_name}"
+
+    logger.info(f"Docker Engine: {docker_version} | Containerd: {docker_containerd} | Compose Plugin: {docker_compose}.")
+
+    header_message = (
+        f"*{node_name}* (.digest)\n"
+        f"- docker engine: {docker_version},\n"
+        f"- containerd: {docker_containerd},\n"
+        f"- compose plugin: {docker_compose},\n"
+        f"- auto-upgrade mode: {'On' if upgrade_mode else 'Off'},\n"
+    )
+
+    if startup_message:
+        send_message(f"{header_message}{monitoring_message}")
+
+    header_message = header_message.split('\n')[0]
+    header_message = f"{header_message}\n"
+
+    logger.info(f"Initialization complete. Auto-upgrade mode: {'On' if upgrade_mode else 'Off'}.")
+    logger.info(f"Notifications to a messaging system: {'On' if notify_enabled else 'Off'}.")
+
+    schedule_upgrades()
+    logger.info(f"First scheduled image upgrade check: {next_run_time}.")
+
+    checkonly_container_images()
+
+    logger.info(f"Check intervals (minutes): latest/rolling {check_intervals['rolling']}, major {check_intervals['major']}, pinned {check_intervals['pinned']}.")
+    schedule.every().minute.do(checkonly_container_images)
+    schedule.every(config_reload_interval).seconds.do(reload_config)
+
+    while True:
+        schedule.run_pending()
+        time.sleep(min(max(schedule.idle_seconds() or 60, 1), 60))
+
+
+def format_bytes(size) -> str:
+    """Format a byte count for display, or 'unknown size' for None."""
+    return "unknown size" if size is None else f"{size / (1024 * 1024):.2f} MB"
+
+
+def run_cli(args) -> int:
+    """Run a single check or upgrade without the web interface. Returns the process exit code."""
+    global header_message, notify_enabled, list_of_outdated_images
+
+    if args.quiet or args.json:
+        console_handler.setLevel(logging.WARNING)
+    if args.no_notify:
+        notify_enabled = False
+
+    try:
+        docker.DockerClient(base_url=platform_base_url, version="auto").ping()
+    except Exception as e:
+        logger.error(f"Docker is not reachable: {e}.")
+        return 1
+
+    node_name = get_docker_engine_info().get('docker_engine_name', 'N/A') if notify_enabled else socket.gethostname()
+    header_message = f"*{node_name}* (.digest)\n"
+
+    if args.command == "check":
+        get_outdated_digests_list()
+        statuses = [data.status for data in docker_image_data]
+        result = {
+            "command": "check",
+            "images": [data.to_dict() for data in docker_image_data],
+            "outdated": statuses.count("outdated"),
+            "errors": statuses.count("error") + statuses.count("unavailable"),
+        }
+        exit_code = 2 if result["outdated"] else 1 if result["errors"] else 0
+        lines = [
+            f"{data.status:<11} {data.display_image} ({', '.join(data.container_name)})" + (f" -> {data.newer_tag}" if data.newer_tag else "")
+            for data in docker_image_data
+        ]
+    else:
+        list_of_outdated_images = apply_pull_limit(get_outdated_digests())
+        result = {"command": "upgrade", "dry_run": args.dry_run, "outdated": list_of_outdated_images}
+        if args.dry_run:
+            plan = result["plan"] = plan_upgrade(list_of_outdated_images)
+            exit_code = 2 if list_of_outdated_images else 0
+            lines = [
+                f"pull {entry['image']} ({format_bytes(entry['download_bytes'])}) for {', '.join(entry['containers'])}"
+                for entry in plan["images"]
+            ]
+            lines += [f"restart compose project {project['project']}: {', '.join(project['services'])}" for project in plan["compose_projects"]]
+            lines += [f"update swarm service {entry['service']}: {entry['image']}" for entry in plan["swarm_services"]]
+            if plan["images"]:
+                lines.append(
+                    f"total download {format_bytes(plan['download_bytes'])}, expected downtime {plan['expected_downtime_seconds']}s, "
+                    f"estimated duration {plan['estimated_duration_seconds']}s"
+                )
+        else:
+            result["success"] = pull_and_restart_outdated_images()
+            get_outdated_digests_list()
+            exit_code = 0 if result["success"] else 1
+            lines = [f"upgrade {entry['container_name']}: {entry['image']}" for entry in list_of_outdated_images]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("\n".join(lines) if lines else "All images are up to date.")
+
+    return exit_code
+
+
+def main(argv=None) -> int:
+    """Initialize and start monitoring, or run a one-shot command."""
+    global config_file, file_db, file_checkpoint, platform_base_url, monitoring_message
+
+    parser = argparse.ArgumentParser(prog="watchdigest", description="Monitor and upgrade outdated Docker container images.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("serve", help="run the web interface and scheduler (default)")
+    for command, help_text in (("check", "check all images once"), ("upgrade", "upgrade outdated images once")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("--json", action="store_true", help="print machine-readable results")
+        subparser.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+        subparser.add_argument("--no-notify", action="store_true", help="do not send messaging notifications")
+        if command == "upgrade":
+            subparser.add_argument("--dry-run", action="store_true", help="list outdated images without pulling or restarting")
+    args = parser.parse_args(argv)
+
+    if args.command in (None, "serve"):
+        open_log_ring(os.path.join(os.path.dirname(os.path.realpath(__file__)), "logs.ring"))
+        logger.info(f"Starting container image monitor...")
 
     config_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "config.json")
     file_db = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data.db")
+    file_checkpoint = os.path.join(os.path.dirname(os.path.realpath(__file__)), "upgrade.json")
 
     platform_base_url = get_platform_base_url()
-    if platform_base_url:
-        start_times = default_start_times
-    
-        compose_files = default_compose_files
-    
-        dots = {"orange": "\U0001F7E0", "green": "\U0001F7E2", "red": "\U0001F534", "yellow": "\U0001F7E1", "white": "\U000026AA"}
-        square_dots = {"orange": "\U0001F7E7", "green": "\U0001F7E9", "red": "\U0001F7E5", "yellow": "\U0001F7E8", "white": "\U0001F533"}
-    
-        docker_info = get_docker_engine_info()
-        compose_version = get_compose_version()
-        node_name = docker_info.get('docker_engine_name', 'N/A')
-        docker_version = docker_info.get('docker_version', 'N/A')
-        docker_compose = compose_version.get('docker_compose_version', 'N/A')
-        containerd_version = get_containerd_version()
-        docker_containerd = containerd_version.get('containerd_version', 'N/A')
-        h1_string = f"{node_name}"
-        
-        monitoring_message = ""
-    
-        logger.info(f"Docker Engine: {docker_version} | Containerd: {docker_containerd} | Compose Plugin: {docker_compose}.")
-    
-        header_message = (
-            f"*{node_name}* (.digest)\n"
-            f"- docker engine: {docker_version},\n"
-            f"- containerd: {docker_containerd},\n"
-            f"- compose plugin: {docker_compose},\n"
-            f"- auto-upgrade mode: {'On' if upgrade_mode else 'Off'},\n"
-        )
-    
-        if os.path.exists(file_db):
-            try:
-                with open(file_db, "r") as file:
-                    old_list = file.readlines()
-            except Exception as e:
-                logger.warning(f"Unable to read {file_db}: {e}.")
-    
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, "r") as file:
-                    config_json = json.load(file)
-                startup_message = config_json.get("STARTUP_MESSAGE", True)
-                notify_enabled = config_json.get("NOTIFY_ENABLED", False)
-                default_dot_style = config_json.get("DEFAULT_DOT_STYLE", True)
-                upgrade_mode = config_json.get("UPGRADE_MODE", True)
-                start_times = config_json.get("START_TIMES", default_start_times)
-                compose_files = config_json.get("COMPOSE_FILES", default_compose_files)
-                if not notify_enabled:
-                    startup_message = False
-                
-                no_messaging_keys = ["STARTUP_MESSAGE", "NOTIFY_ENABLED", "DEFAULT_DOT_STYLE", "UPGRADE_MODE", "START_TIMES", "COMPOSE_FILES"]
-                if notify_enabled:
-                    messaging_platforms = list(set(config_json) - set(no_messaging_keys))
-                    for platform in messaging_platforms:
-                        if config_json[platform].get("ENABLED", False):
-                            for key, value in config_json[platform].items():
-                                platform_key = f"platform_{key.lower()}"
-                                if platform_key in globals():
-                                    globals()[platform_key] = (globals()[platform_key] if isinstance(globals()[platform_key], list) else [globals()[platform_key]])
-                                    globals()[platform_key].extend(value if isinstance(value, list) else [value])
-                                else:
-                                    globals()[platform_key] = value if isinstance(value, list) else [value]
-                            monitoring_message += f"- messaging: {platform.lower().capitalize()},\n"
-                    monitoring_message = "\n".join([*sorted(monitoring_message.splitlines()), ""])
-                    monitoring_message += (
-                        f"- startup message: {'On' if startup_message else 'Off'},\n"
-                        f"- dot style: {'Round' if default_dot_style else 'Square'}.\n"
-                    )
-            
-                    if all(value in globals() for value in ["platform_webhook_url", "platform_header", "platform_payload", "platform_format_message"]):
-                        if startup_message:
-                            send_message(f"{header_message}{monitoring_message}")
-            except (json.JSONDecodeError, ValueError, TypeError, KeyError) as e:
-                logger.error(f"Failed to read or parse config.json: {e}. Falling back to default settings.")
-        else:
-            logger.error(f"Configuration file 'config.json' not found. Falling back to default settings.")
-    
-        if not default_dot_style:
-            dots = square_dots
-        orange_dot, green_dot, red_dot, yellow_dot, white_dot = dots.values()
-    
-        header_message = header_message.split('\n')[0]
-        header_message = f"{header_message}\n"
-    
-        flask_thread = threading.Thread(target=run_flask, daemon=True)
-        flask_thread.start()
-        
-        logger.info(f"Initialization complete. Auto-upgrade mode: {'On' if upgrade_mode else 'Off'}.")
-        logger.info(f"Notifications to a messaging system: {'On' if notify_enabled else 'Off'}.")
-    
-        try:
-            start_times_outdate_check = get_starts_check_times(start_times, upgrade_mode)
-            if upgrade_mode:
-                logger.info(f"Using check times for image upgrade: {', '.join(start_times)}.")
-            next_run_time_check = get_next_start_time(start_times)
-            next_run_time = get_next_start_time(start_times)
-            logger.info(f"First scheduled image upgrade check: {next_run_time_check}.")
-        except (ValueError, TypeError) as e:
-            start_times_outdate_check = get_starts_check_times(default_start_times, upgrade_mode)
-            logger.error(f"Error: {e}")
-            logger.warning(f"Invalid start time settings in config.json. Falling back to default settings: {start_times}. Please update the configuration file.")
-    
-        checkonly_container_images()
-    
-        for stime in start_times_outdate_check:
-            schedule.every().day.at(stime).do(checkonly_container_images)
-    
-        if upgrade_mode:
-            for stime in start_times:
-                schedule.every().day.at(stime).do(maintain_container_images)
-    
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
-    else:
-        logger.error("Unsupported operating system!")
\ No newline at end of file
+    if not platform_base_url:
+        logger.error("Unsupported operating system!")
+        return 1
+
+    load_state()
+    monitoring_message = load_config()
+
+    if args.command in (None, "serve"):
+        run_service()
+        return 0
+
+    return run_cli(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())